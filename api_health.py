@@ -0,0 +1,41 @@
+import threading
+import time
+
+
+class ApiHealthMonitor:
+    """Runs an API health check once, then re-checks it on a background thread"""
+
+    def __init__(self, check_fn, interval_seconds=300):
+        self.check_fn = check_fn
+        self.interval_seconds = interval_seconds
+        self.healthy = False
+        self.last_error = None
+        self.last_checked = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check_now(self):
+        try:
+            self.check_fn()
+            healthy, error = True, None
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        with self._lock:
+            self.healthy = healthy
+            self.last_error = error
+            self.last_checked = time.time()
+        return healthy
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.check_now()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='api-health', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -3,20 +3,35 @@ import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from PIL import Image
 import io
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 import json
-from datetime import datetime, timedelta
 import numpy as np
 import base64
-from image_scraper import ChromaImageScraper
-import time
-from PIL import ImageDraw, ImageFont, ImageColor
+from scraper_pool import get_scraper_pool, generate_batch
+from image_store import get_image_store, sniff_image_type
+from response_cache import get_response_cache, make_cache_key
+from rate_limiter import get_rate_limiter
+from api_health import ApiHealthMonitor
+from caption_renderer import (
+    PREVIEW_MAX_SIDE, POSITIONS as CAPTION_POSITIONS, CaptionSpec, CaptionStyle,
+    add_caption_to_image, caption_batch_zip, get_caption_renderer
+)
+from image_export import (
+    FORMATS as EXPORT_FORMATS, PLATFORM_PRESETS, PRESETS as EXPORT_PRESETS, encode_image, get_export_cache
+)
+from campaign_data import CAMPAIGN_DATA_DIR, STREAMABLE_EXTENSIONS, load_campaign_data
+from campaign_analytics import (
+    REVENUE_PER_CONVERSION, get_cube, get_trend_index, kpi_totals, load_campaign_cube
+)
+from campaign_charts import (
+    cached_figure, cost_treemap_figure, cpc_figure, funnel_figure, radar_figure,
+    roas_figure, sunburst_figure, trend_figure
+)
+from derived_metrics import safe_divide
+from downsample import DEFAULT_CHART_WIDTH, max_points_for_width
 from time import sleep
 
 # Set page config
@@ -133,34 +148,54 @@ if 'generated_image_path' not in st.session_state:
     st.session_state.generated_image_path = None
 if 'generated_caption' not in st.session_state:
     st.session_state.generated_caption = ""
+if 'generated_variants' not in st.session_state:
+    st.session_state.generated_variants = []
+if 'image_buffers' not in st.session_state:
+    st.session_state.image_buffers = {}
 
-class RateLimiter:
-    def __init__(self, requests_per_minute=60):
-        self.requests_per_minute = requests_per_minute
-        self.requests = []
+def get_image_bytes(path):
+    """Encoded bytes of a generated image, read from disk once per session.
     
-    def wait_if_needed(self):
-        now = datetime.now()
-        self.requests = [req for req in self.requests 
-                        if now - req < timedelta(minutes=1)]
-        
-        if len(self.requests) >= self.requests_per_minute:
-            sleep_time = 60 - (now - self.requests[0]).total_seconds()
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-        
-        self.requests.append(now)
+    Only ``path`` and the current Post Image variations stay buffered, so
+    earlier logos and generations do not pile up in session memory.
+    """
+    buffers = st.session_state.image_buffers
+    if path not in buffers:
+        with open(path, "rb") as file:
+            buffers[path] = file.read()
+    live = set(st.session_state.generated_variants) | {path}
+    for stale in [key for key in buffers if key not in live]:
+        del buffers[stale]
+    return buffers[path]
 
-# Initialize rate limiter
-rate_limiter = RateLimiter(requests_per_minute=50)
+def image_mime(data):
+    """(mime type, extension) from an image's magic bytes"""
+    ext = sniff_image_type(data) or 'png'
+    return f"image/{'jpeg' if ext == 'jpg' else ext}", ext
 
-def safe_generate_content(prompt, model=None):
+# Initialize rate limiter (shared by every session in this process; set
+# RATE_LIMIT_DB to share it across processes as well)
+rate_limiter = get_rate_limiter(requests_per_minute=50, db_path=os.getenv('RATE_LIMIT_DB'))
+
+def safe_generate_content(prompt, model=None, generation_config=None, use_cache=True):
     if model is None:
         model = genai.GenerativeModel('gemini-pro')
+    
+    # Identical prompts are served from disk without touching the rate limit
+    cache = get_response_cache()
+    cache_key = make_cache_key(prompt, getattr(model, 'model_name', str(model)), generation_config)
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
     try:
-        rate_limiter.wait_if_needed()
-        response = model.generate_content(prompt)
+        if not rate_limiter.acquire(timeout=15):
+            st.warning("Rate limit reached, please try again in a few seconds")
+            return None
+        response = model.generate_content(prompt, generation_config=generation_config)
         if response and hasattr(response, 'text'):
+            cache.set(cache_key, response.text)
             return response.text
         else:
             return "Error: No response generated"
@@ -178,23 +213,33 @@ if not GOOGLE_API_KEY:
     st.error("Please set up your Google API key in the .env file")
     st.stop()
 
-try:
+@st.cache_resource
+def init_gemini(api_key):
+    """Configure Gemini and start the health monitor once per process"""
     # Basic configuration without additional settings
-    genai.configure(api_key=GOOGLE_API_KEY)
+    genai.configure(api_key=api_key)
     
     # Initialize models
-    model = genai.GenerativeModel('gemini-pro')
-    vision_model = genai.GenerativeModel('gemini-pro-vision')
+    text_model = genai.GenerativeModel('gemini-pro')
+    image_model = genai.GenerativeModel('gemini-pro-vision')
     
-    # Quick test
-    response = model.generate_content("test")
-    if not response:
-        raise Exception("No response from API")
-        
+    # Model metadata lookup validates the key without spending generation quota
+    monitor = ApiHealthMonitor(lambda: genai.get_model(text_model.model_name), interval_seconds=300)
+    monitor.check_now()
+    monitor.start()
+    return text_model, image_model, monitor
+
+try:
+    model, vision_model, api_monitor = init_gemini(GOOGLE_API_KEY)
 except Exception as e:
     st.error(f"API Error: {str(e)}")
     st.stop()
 
+# Re-check right away if the background check last failed, so recovery is immediate
+if not api_monitor.healthy and not api_monitor.check_now():
+    st.error(f"API Error: {api_monitor.last_error}")
+    st.stop()
+
 # Page selection
 page = st.sidebar.selectbox(
     "",
@@ -379,6 +424,8 @@ elif page == "Content Generator":
             options=["Very Short", "Short", "Medium", "Long", "Very Long"]
         )
 
+    reuse_response = st.checkbox("Reuse previous response for repeated prompts", value=True, key="reuse_content")
+    
     if st.button("Generate Content"):
         if not target_audience or not key_points:
             st.error("Please fill in all required fields")
@@ -398,7 +445,7 @@ elif page == "Content Generator":
                 4. Relevant hashtags (if social media)
                 """
                 
-                generated_content = safe_generate_content(prompt)
+                generated_content = safe_generate_content(prompt, use_cache=reuse_response)
                 if generated_content:
                     st.markdown("### 📝 Generated Content")
                     st.markdown(generated_content)
@@ -445,46 +492,39 @@ elif page == "Logo Generator":
             ["Modern", "Classic", "Minimalist", "Bold", "Playful", "Luxurious"]
         )
     
+    reuse_images = st.checkbox("Reuse stored images for repeated prompts", value=True)
+    
     if st.button("Generate Logo"):
         if not company_name:
             st.error("Please enter a company name")
         else:
             with st.spinner("Generating logo..."):
                 try:
-                    # Initialize the scraper
-                    scraper = ChromaImageScraper()
-                    
                     # Only use company name in the prompt
                     prompt = f"{company_name} logo"
                     
-                    # Generate and get the image
-                    logo_path = scraper.get_generated_image(prompt)
+                    # Repeated prompts come from the image store, others borrow a warm browser
+                    logo_path = get_scraper_pool().get_generated_image(prompt, use_store=reuse_images)
                     
                     if logo_path:
-                        # Display the generated logo
-                        st.image(logo_path, caption="Generated Logo")
+                        # One read serves both the preview and the download
+                        logo_bytes = get_image_bytes(logo_path)
+                        st.image(logo_bytes, caption="Generated Logo")
                         st.success("Logo generated successfully!")
                         
                         # Add download button
-                        with open(logo_path, "rb") as file:
-                            btn = st.download_button(
-                                label="Download Logo",
-                                data=file,
-                                file_name=f"{company_name}_logo.png",
-                                mime="image/png"
-                            )
+                        logo_mime, logo_ext = image_mime(logo_bytes)
+                        btn = st.download_button(
+                            label="Download Logo",
+                            data=logo_bytes,
+                            file_name=f"{company_name}_logo.{logo_ext}",
+                            mime=logo_mime
+                        )
                     else:
                         st.error("Failed to generate logo")
                     
-                    # Close the scraper
-                    scraper.close()
-                    
                 except Exception as e:
                     st.error(f"Error generating logo: {str(e)}")
-                    try:
-                        scraper.close()
-                    except:
-                        pass
 
 elif page == "Post Image Generator":
     st.title("📸 Post Image Generator")
@@ -516,39 +556,84 @@ elif page == "Post Image Generator":
             placeholder="Describe the image you want to generate..."
         )
         
+        # One pooled browser per variation, so a batch takes about as long as its slowest image
+        max_variations = get_scraper_pool().max_size
+        if max_variations > 1:
+            variation_count = st.slider(
+                "Number of Variations", 1, max_variations, 1,
+                help=f"Up to {max_variations} variations render in parallel, one per pooled browser (SCRAPER_POOL_SIZE)"
+            )
+        else:
+            variation_count = 1
+        reuse_images = st.checkbox("Reuse stored images for repeated prompts", value=True)
+        
         if st.button("Generate Image"):
             try:
                 with st.spinner("Generating image..."):
-                    scraper = ChromaImageScraper()
                     prompt = f"""Create a {mood} {style_preference} image for {platform} 
                                with {color_theme} colors. {image_description}"""
                     
-                    image_path = scraper.get_generated_image(prompt)
-                    if image_path:
-                        st.session_state.generated_image_path = image_path
-                        st.success("Image generated successfully!")
+                    # Buffers of the previous generation are no longer reachable
+                    st.session_state.image_buffers = {}
+                    if variation_count == 1:
+                        image_path = get_scraper_pool().get_generated_image(prompt, use_store=reuse_images)
+                        if image_path:
+                            st.session_state.generated_image_path = image_path
+                            st.session_state.generated_variants = [image_path]
+                            st.success("Image generated successfully!")
+                    else:
+                        # Fan the variations out over pooled browsers and show each as it lands
+                        prompts = [f"{prompt} Variation {i + 1}." for i in range(variation_count)]
+                        slots = st.columns(variation_count)
+                        variants = [None] * variation_count
+                        for result in generate_batch(prompts, use_store=reuse_images):
+                            with slots[result.index]:
+                                if result.path:
+                                    st.image(get_image_bytes(result.path), caption=f"Variation {result.index + 1}")
+                                else:
+                                    st.error(f"Variation {result.index + 1} failed: {result.error}")
+                            variants[result.index] = result.path
                         
-                scraper.close()
+                        variants = [path for path in variants if path]
+                        if variants:
+                            st.session_state.generated_variants = variants
+                            st.session_state.generated_image_path = variants[0]
+                            st.success(f"Generated {len(variants)} of {variation_count} variations!")
             except Exception as e:
                 st.error(f"Error generating image: {str(e)}")
         
-        # Always show the image if it exists in session state
-        if 'generated_image_path' in st.session_state and st.session_state.generated_image_path and os.path.exists(st.session_state.generated_image_path):
-            st.image(st.session_state.generated_image_path, caption="Generated Image")
-            with open(st.session_state.generated_image_path, "rb") as file:
-                st.download_button(
-                    label="Download Original Image",
-                    data=file,
-                    file_name="generated_image.png",
-                    mime="image/png",
-                    key="download_original"
-                )
+        # Let the user pick which variation to caption and download
+        if len(st.session_state.generated_variants) > 1:
+            st.session_state.generated_image_path = st.selectbox(
+                "Selected Variation",
+                st.session_state.generated_variants,
+                format_func=lambda path: f"Variation {st.session_state.generated_variants.index(path) + 1}"
+            )
+        
+        # Always show the image if it exists in session state; the in-memory
+        # copy serves display, captioning, export and download
+        generated_image = None
+        image_path = st.session_state.generated_image_path
+        if image_path and (image_path in st.session_state.image_buffers or os.path.exists(image_path)):
+            generated_image = get_image_bytes(image_path)
+        
+        if generated_image is not None:
+            st.image(generated_image, caption="Generated Image")
+            original_mime, original_ext = image_mime(generated_image)
+            st.download_button(
+                label="Download Original Image",
+                data=generated_image,
+                file_name=f"generated_image.{original_ext}",
+                mime=original_mime,
+                key="download_original"
+            )
     
     with caption_col:
         st.markdown("### Caption Options")
         caption_tab1, caption_tab2 = st.tabs(["AI Generated Caption", "Manual Caption"])
         
         with caption_tab1:
+            reuse_caption = st.checkbox("Reuse previous caption for repeated prompts", value=True, key="reuse_caption")
             if st.button("Generate Caption"):
                 with st.spinner("Generating caption..."):
                     caption_prompt = f"""
@@ -559,7 +644,7 @@ elif page == "Post Image Generator":
                     
                     Keep it concise and engaging. Include relevant hashtags.
                     """
-                    generated_caption = safe_generate_content(caption_prompt)
+                    generated_caption = safe_generate_content(caption_prompt, use_cache=reuse_caption)
                     if generated_caption:
                         st.session_state.generated_caption = generated_caption
             
@@ -578,19 +663,18 @@ elif page == "Post Image Generator":
             )
     
     # Caption Overlay Options (below both columns)
-    if 'generated_image_path' in st.session_state and st.session_state.generated_image_path and os.path.exists(st.session_state.generated_image_path):
+    if generated_image is not None:
         st.markdown("---")
         st.markdown("### Caption Overlay Options")
         add_caption = st.checkbox("Add Caption to Image")
+        # Exports caption the image after it is fitted to the preset, so the crop never cuts the caption
+        export_caption, export_style = None, None
         
         if add_caption:
             overlay_col1, overlay_col2, overlay_col3 = st.columns(3)
             
             with overlay_col1:
-                caption_position = st.selectbox(
-                    "Caption Position",
-                    ["Top", "Bottom", "Center", "Top-Left", "Top-Right", "Bottom-Left", "Bottom-Right"]
-                )
+                caption_position = st.selectbox("Caption Position", CAPTION_POSITIONS)
                 bg_color = st.color_picker("Background Color", "#000000")
             
             with overlay_col2:
@@ -604,75 +688,129 @@ elif page == "Post Image Generator":
             # Get caption text from either AI or manual input
             caption_text = st.session_state.get('generated_caption', '') if st.session_state.get('generated_caption', '') else manual_caption
             
-            if caption_text and st.button("Apply Caption", key="apply_caption"):
+            # Rendering is memoized per (image, caption, style), so the preview
+            # follows every control without an extra click
+            if caption_text:
                 try:
-                    # Open the image
-                    img = Image.open(st.session_state.generated_image_path)
-                    
-                    # Create a copy for modification
-                    modified_image = img.copy()
-                    draw = ImageDraw.Draw(modified_image, 'RGBA')
-                    
-                    # Load font
-                    try:
-                        font = ImageFont.truetype("arial.ttf", caption_size)
-                    except:
-                        font = ImageFont.load_default()
-                    
-                    # Calculate text size
-                    bbox = draw.textbbox((0, 0), caption_text, font=font)
-                    text_width = bbox[2] - bbox[0]
-                    text_height = bbox[3] - bbox[1]
-                    
-                    # Position mapping with adjusted padding for bottom position
-                    bottom_padding = 40  # Increased padding for bottom position
-                    position_map = {
-                        "Top": ((img.width - text_width) // 2, 20),
-                        "Bottom": ((img.width - text_width) // 2, img.height - text_height - bottom_padding),
-                        "Center": ((img.width - text_width) // 2, (img.height - text_height) // 2),
-                        "Top-Left": (20, 20),
-                        "Top-Right": (img.width - text_width - 20, 20),
-                        "Bottom-Left": (20, img.height - text_height - bottom_padding),
-                        "Bottom-Right": (img.width - text_width - 20, img.height - text_height - bottom_padding)
-                    }
-                    
-                    x, y = position_map.get(caption_position, (20, 20))
-                    
-                    # Draw background rectangle with extra padding
-                    bg_rgba = (*ImageColor.getrgb(bg_color), int(255 * bg_opacity))
-                    padding = 20
-                    draw.rectangle(
-                        [x - padding, y - padding, x + text_width + padding, y + text_height + padding],
-                        fill=bg_rgba
+                    style = CaptionStyle(
+                        position=caption_position,
+                        size=caption_size,
+                        text_color=text_color,
+                        bg_color=bg_color,
+                        text_opacity=text_opacity,
+                        bg_opacity=bg_opacity
                     )
-                    
-                    # Draw text twice to create bold effect
-                    text_rgba = (*ImageColor.getrgb(text_color), int(255 * text_opacity))
-                    # First pass
-                    draw.text((x-1, y), caption_text, font=font, fill=text_rgba)
-                    draw.text((x+1, y), caption_text, font=font, fill=text_rgba)
-                    draw.text((x, y-1), caption_text, font=font, fill=text_rgba)
-                    draw.text((x, y+1), caption_text, font=font, fill=text_rgba)
-                    # Second pass (main text)
-                    draw.text((x, y), caption_text, font=font, fill=text_rgba)
+                    # Encoded once per (image, caption, style); never written to disk
+                    captioned_bytes = get_caption_renderer().render_bytes(generated_image, caption_text, style)
+                    export_caption, export_style = caption_text, style
                     
                     # Display modified image
-                    st.image(modified_image, caption="Image with Caption")
-                    
-                    # Save and provide download button
-                    output_path = st.session_state.generated_image_path.replace('.png', '_with_caption.png')
-                    modified_image.save(output_path, "PNG")
+                    st.image(captioned_bytes, caption="Image with Caption")
                     
-                    with open(output_path, "rb") as file:
+                    download_col, save_col = st.columns(2)
+                    with download_col:
                         st.download_button(
                             label="Download Image with Caption",
-                            data=file,
+                            data=captioned_bytes,
                             file_name="generated_image_with_caption.png",
                             mime="image/png",
                             key="download_captioned"
                         )
+                    with save_col:
+                        # Persisting is opt-in and happens off the request thread
+                        if st.button("Save to Image Library", key="save_captioned"):
+                            get_image_store().put_async(captioned_bytes)
+                            st.success("Saving captioned image to the library")
                 except Exception as e:
                     st.error(f"Error adding caption: {str(e)}")
+            
+            # Many caption/position variants of the same image in one archive
+            with st.expander("🗂️ Batch Caption Variants"):
+                variant_captions = st.text_area(
+                    "Caption variants (one per line)",
+                    value=caption_text,
+                    height=150
+                )
+                variant_positions = st.multiselect(
+                    "Positions", CAPTION_POSITIONS, default=[caption_position]
+                )
+                variant_lines = [line.strip() for line in variant_captions.splitlines() if line.strip()]
+                
+                if variant_lines and variant_positions and st.button("Render Variants", key="render_variants"):
+                    specs = [
+                        CaptionSpec(
+                            line,
+                            CaptionStyle(
+                                position=position,
+                                size=caption_size,
+                                text_color=text_color,
+                                bg_color=bg_color,
+                                text_opacity=text_opacity,
+                                bg_opacity=bg_opacity
+                            ),
+                            f"caption_{line_no + 1:02d}_{position.lower()}"
+                        )
+                        for line_no, line in enumerate(variant_lines)
+                        for position in variant_positions
+                    ]
+                    progress = st.progress(0.0, text=f"Rendering {len(specs)} variants...")
+                    done = []
+                    
+                    def report(result):
+                        done.append(result)
+                        progress.progress(len(done) / len(specs), text=f"Rendered {len(done)} of {len(specs)}")
+                        if result.error:
+                            st.warning(f"{result.spec.name} failed: {result.error}")
+                    
+                    st.session_state.caption_variants_zip = (
+                        image_path, caption_batch_zip(generated_image, specs, on_result=report)
+                    )
+                
+                # An archive rendered from another image or variation is stale
+                variants_zip = st.session_state.get('caption_variants_zip')
+                if variants_zip and variants_zip[0] != image_path:
+                    del st.session_state.caption_variants_zip
+                    variants_zip = None
+                if variants_zip:
+                    st.download_button(
+                        label="Download Caption Variants (ZIP)",
+                        data=variants_zip[1],
+                        file_name="caption_variants.zip",
+                        mime="application/zip",
+                        key="download_variants"
+                    )
+        
+        # Platform-sized, compressed downloads; encoded once per source and setting
+        st.markdown("---")
+        st.markdown("### Export for Platform")
+        export_col1, export_col2, export_col3 = st.columns(3)
+        with export_col1:
+            preset_names = list(EXPORT_PRESETS)
+            export_preset = st.selectbox(
+                "Size Preset",
+                preset_names,
+                index=preset_names.index(PLATFORM_PRESETS.get(platform, preset_names[0]))
+            )
+        with export_col2:
+            export_format = st.selectbox("Format", list(EXPORT_FORMATS))
+        with export_col3:
+            export_quality = st.slider("Quality", 40, 100, 85, disabled=export_format == "PNG")
+        
+        try:
+            exported = get_export_cache().export(
+                generated_image, export_preset, export_format, export_quality,
+                caption=export_caption, style=export_style
+            )
+            st.caption(f"{exported.size[0]}×{exported.size[1]} {export_format}: {len(exported.data) / 1024:,.0f} KB")
+            st.download_button(
+                label=f"Download for {export_preset}",
+                data=exported.data,
+                file_name=f"post_{export_preset.lower().replace(' ', '_')}.{exported.extension}",
+                mime=exported.mime,
+                key="download_export"
+            )
+        except Exception as e:
+            st.error(f"Error exporting image: {str(e)}")
 
 elif page == "Visual Content Creator":
     st.title("🖼️ Visual Content Creator")
@@ -681,8 +819,10 @@ elif page == "Visual Content Creator":
     uploaded_file = st.file_uploader("Upload an image", type=["png", "jpg", "jpeg"])
     
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded Image")
+        # Large photos are shown and captioned on a downscaled proxy; the
+        # full-resolution render only happens for the download
+        upload_bytes = uploaded_file.getvalue()
+        st.image(get_caption_renderer().preview(upload_bytes)[0], caption="Uploaded Image")
         
         # Caption options
         st.markdown("### Caption Options")
@@ -703,19 +843,39 @@ elif page == "Visual Content Creator":
                 text_color = st.color_picker("Text Color", "#FFFFFF")
                 bg_opacity = st.slider("Background Opacity", 0.0, 1.0, 0.5)
             
-            if st.button("Apply Caption"):
+            if caption_text:
                 try:
-                    # Apply caption to image
-                    img_with_caption = add_caption_to_image(
-                        image, caption_text, caption_position, 
-                        font_size, text_color, bg_opacity
+                    preview = add_caption_to_image(
+                        upload_bytes, caption_text, caption_position,
+                        font_size, text_color, bg_opacity, max_side=PREVIEW_MAX_SIDE
                     )
-                    st.image(img_with_caption, caption="Image with Caption")
+                    st.image(preview, caption="Image with Caption (preview)")
+                    
+                    export_key = (uploaded_file.name, uploaded_file.size, caption_text, caption_position, font_size, text_color, bg_opacity)
+                    if st.button("Prepare Full-Resolution Image"):
+                        with st.spinner("Rendering at full resolution..."):
+                            img_with_caption = add_caption_to_image(
+                                upload_bytes, caption_text, caption_position,
+                                font_size, text_color, bg_opacity
+                            )
+                            # Photos stay JPEG; a full-size PNG of a phone photo is tens of MB
+                            export_format = "JPEG" if sniff_image_type(upload_bytes) == 'jpg' else "PNG"
+                            st.session_state.creator_export = (
+                                export_key, encode_image(img_with_caption, export_format, 95), export_format
+                            )
                     
                     # Add download button
-                    if st.button("Download Image"):
-                        # Add download functionality
-                        pass
+                    creator_export = st.session_state.get('creator_export')
+                    if creator_export and creator_export[0] == export_key:
+                        _, export_data, export_format = creator_export
+                        export_mime, export_ext = image_mime(export_data)
+                        st.download_button(
+                            label="Download Image",
+                            data=export_data,
+                            file_name=f"captioned_image.{export_ext}",
+                            mime=export_mime,
+                            key="download_creator"
+                        )
                 except Exception as e:
                     st.error(f"Error adding caption: {str(e)}")
 
@@ -749,6 +909,8 @@ elif page == "Audience Insights":
                 placeholder="What do they want to achieve?"
             )
         
+        reuse_audience = st.checkbox("Reuse previous analysis for repeated inputs", value=True, key="reuse_audience")
+        
         if st.button("Analyze Audience"):
             if not demographics or not interests:
                 st.error("Please fill in the required fields")
@@ -773,7 +935,7 @@ elif page == "Audience Insights":
                     
                     Format the response in markdown with clear sections.
                     """
-                    analysis = safe_generate_content(prompt)
+                    analysis = safe_generate_content(prompt, use_cache=reuse_audience)
                     if analysis:
                         st.markdown("### 📊 Audience Analysis Report")
                         st.markdown(analysis)
@@ -785,6 +947,8 @@ elif page == "Audience Insights":
             placeholder="Enter competitor names and their key strengths"
         )
         
+        reuse_competitors = st.checkbox("Reuse previous analysis for repeated inputs", value=True, key="reuse_competitors")
+        
         if st.button("Analyze Competitors"):
             if not competitors:
                 st.error("Please enter competitor information")
@@ -802,7 +966,7 @@ elif page == "Audience Insights":
                     
                     Format as a strategic analysis report.
                     """
-                    analysis = safe_generate_content(prompt)
+                    analysis = safe_generate_content(prompt, use_cache=reuse_competitors)
                     if analysis:
                         st.markdown("### 🎯 Competitive Analysis Report")
                         st.markdown(analysis)
@@ -881,9 +1045,27 @@ elif page == "Campaign Management Hub":
         # File upload section with multiple format support
         uploaded_file = st.file_uploader(
             "Upload Campaign Data", 
-            type=['csv', 'xlsx', 'json'],
-            help="Support for CSV, Excel, and JSON formats"
+            type=['csv', 'xlsx', 'json', 'jsonl', 'parquet', 'feather', 'arrow'],
+            help="Support for CSV, Excel, JSON, JSON-lines, Parquet and Arrow/Feather formats"
+        )
+        
+        # Streaming mode aggregates chunk by chunk and never holds the raw rows
+        streaming_mode = st.checkbox(
+            "Streaming mode (large files)",
+            help="Reads CSV, JSON-lines, Parquet or Arrow in chunks with bounded memory"
+        )
+        parallel_mode = st.checkbox(
+            "Multi-core aggregation",
+            help="Splits large in-memory datasets across worker processes"
         )
+        server_path = ''
+        # Only offered when CAMPAIGN_DATA_DIR names the directory it may read from
+        if streaming_mode and CAMPAIGN_DATA_DIR:
+            server_path = st.text_input(
+                "Or read a campaign file from the server data directory",
+                placeholder="exports/campaigns.parquet",
+                help="Path relative to the configured data directory; avoids uploading files too large for the browser"
+            ).strip()
         
         # Sample data download section
         with st.expander("📥 Download Sample Data"):
@@ -931,36 +1113,43 @@ elif page == "Campaign Management Hub":
                     key='download-json'
                 )
         
-        if uploaded_file:
+        if uploaded_file or server_path:
             try:
-                # Load data based on file type
-                if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file)
-                elif uploaded_file.name.endswith('.xlsx'):
-                    df = pd.read_excel(uploaded_file)
-                else:  # JSON
-                    df = pd.read_json(uploaded_file)
-                
-                # Convert date column to datetime
-                df['date'] = pd.to_datetime(df['date'])
+                if streaming_mode:
+                    source = server_path or uploaded_file
+                    if not (server_path or uploaded_file.name).lower().endswith(STREAMABLE_EXTENSIONS):
+                        raise ValueError("Streaming mode supports CSV, JSON-lines, Parquet and Arrow files")
+                    with st.spinner("Aggregating campaign data in chunks..."):
+                        dataset_key, cube = load_campaign_cube(source)
+                else:
+                    # Parsed once per distinct upload; widget changes reuse the cached frame
+                    dataset_key, df = load_campaign_data(uploaded_file)
+                    
+                    # One grouped pass over the raw rows; every chart below reads the cube
+                    cube = get_cube(dataset_key, df, parallel=parallel_mode)
+                totals = kpi_totals(cube)
                 
                 # Enhanced Dashboard Layout
                 st.markdown("### 📈 Campaign Performance Dashboard")
                 
                 # Expanded KPI metrics row
                 metrics_col1, metrics_col2, metrics_col3, metrics_col4, metrics_col5 = st.columns(5)
+                revenue = totals['conversions'] * REVENUE_PER_CONVERSION
                 with metrics_col1:
-                    st.metric("Total Impressions", f"{df['impressions'].sum():,.0f}")
+                    st.metric("Total Impressions", f"{totals['impressions']:,.0f}")
                 with metrics_col2:
-                    st.metric("Avg. Engagement Rate", f"{(df['engagement'].sum() / df['impressions'].sum() * 100):.2f}%")
+                    st.metric("Avg. Engagement Rate", f"{safe_divide(totals['engagement'], totals['impressions']) * 100:.2f}%")
                 with metrics_col3:
-                    st.metric("Total Conversions", f"{df['conversions'].sum():,.0f}")
+                    st.metric("Total Conversions", f"{totals['conversions']:,.0f}")
                 with metrics_col4:
-                    st.metric("Total Revenue", f"${(df['conversions'].sum() * 50):,.2f}")
+                    st.metric("Total Revenue", f"${revenue:,.2f}")
                 with metrics_col5:
-                    roi = ((df['conversions'].sum() * 50) - df['cost'].sum()) / df['cost'].sum() * 100
+                    roi = safe_divide(revenue - totals['cost'], totals['cost']) * 100
                     st.metric("ROI", f"{roi:.1f}%")
                 
+                # Figures are cached per (dataset, chart, options): a widget change
+                # rebuilds only the chart whose options it touches
+                
                 # Time Series Analysis with Enhanced Features
                 st.markdown("#### 📈 Performance Trends")
                 col1, col2 = st.columns([1, 2])
@@ -969,37 +1158,16 @@ elif page == "Campaign Management Hub":
                     selected_metrics = st.multiselect("Select Metrics", metric_options, 
                                                     default=['impressions', 'engagement'])
                     trend_type = st.radio("Trend View", ["Daily", "Weekly", "Monthly"])
+                    use_webgl = st.checkbox("WebGL rendering", help="Faster for very long time series")
+                    max_points = max_points_for_width(DEFAULT_CHART_WIDTH)
                 
                 with col2:
-                    # Resample data based on selected trend type
-                    if trend_type == "Weekly":
-                        df_trend = df.set_index('date').resample('W').sum().reset_index()
-                    elif trend_type == "Monthly":
-                        df_trend = df.set_index('date').resample('M').sum().reset_index()
-                    else:
-                        df_trend = df
-                    
-                    fig = go.Figure()
-                    for metric in selected_metrics:
-                        fig.add_trace(go.Scatter(
-                            x=df_trend['date'],
-                            y=df_trend[metric],
-                            name=metric.capitalize(),
-                            mode='lines+markers',
-                            line=dict(width=3),
-                            marker=dict(size=8)
-                        ))
-                    fig.update_layout(
-                        title="Metric Trends Over Time",
-                        xaxis_title="Date",
-                        yaxis_title="Value",
-                        hovermode='x unified',
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="right",
-                            x=1
+                    # Daily/weekly/monthly totals come from the precomputed rollup index
+                    fig = cached_figure(
+                        dataset_key, 'trend', (trend_type, tuple(selected_metrics), use_webgl, max_points),
+                        lambda: trend_figure(
+                            get_trend_index(dataset_key, cube).get(trend_type).reset_index(),
+                            selected_metrics, use_webgl, max_points
                         )
                     )
                     st.plotly_chart(fig, use_container_width=True)
@@ -1010,64 +1178,18 @@ elif page == "Campaign Management Hub":
                 
                 with platform_col1:
                     # Radar Chart for Platform Performance
-                    platform_metrics = df.groupby('platform').agg({
-                        'impressions': 'sum',
-                        'engagement': 'sum',
-                        'clicks': 'sum',
-                        'conversions': 'sum',
-                        'cost': 'sum'
-                    }).reset_index()
-                    
-                    # Normalize metrics for radar chart
-                    metrics_to_normalize = ['impressions', 'engagement', 'clicks', 'conversions']
-                    for metric in metrics_to_normalize:
-                        platform_metrics[f'{metric}_normalized'] = (platform_metrics[metric] - platform_metrics[metric].min()) / \
-                                                                 (platform_metrics[metric].max() - platform_metrics[metric].min())
-                    
-                    fig_radar = go.Figure()
-                    for platform in platform_metrics['platform']:
-                        platform_data = platform_metrics[platform_metrics['platform'] == platform]
-                        fig_radar.add_trace(go.Scatterpolar(
-                            r=[platform_data[f'{metric}_normalized'].iloc[0] for metric in metrics_to_normalize],
-                            theta=metrics_to_normalize,
-                            name=platform,
-                            fill='toself'
-                        ))
-                    
-                    fig_radar.update_layout(
-                        polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
-                        showlegend=True,
-                        title="Platform Performance Comparison"
-                    )
-                    st.plotly_chart(fig_radar)
+                    st.plotly_chart(cached_figure(dataset_key, 'radar', (), lambda: radar_figure(cube)))
                 
                 with platform_col2:
                     # Sunburst Chart for Campaign Distribution
-                    fig_sunburst = px.sunburst(
-                        df,
-                        path=['platform', 'campaign_type'],
-                        values='impressions',
-                        title="Campaign Distribution by Platform and Type"
-                    )
-                    st.plotly_chart(fig_sunburst)
+                    st.plotly_chart(cached_figure(dataset_key, 'sunburst', (), lambda: sunburst_figure(cube)))
                 
                 # Conversion Funnel
                 st.markdown("#### 🔄 Conversion Funnel Analysis")
-                funnel_data = [
-                    dict(name="Impressions", value=df['impressions'].sum()),
-                    dict(name="Engagement", value=df['engagement'].sum()),
-                    dict(name="Clicks", value=df['clicks'].sum()),
-                    dict(name="Conversions", value=df['conversions'].sum())
-                ]
-                
-                fig_funnel = go.Figure(go.Funnel(
-                    y=[stage['name'] for stage in funnel_data],
-                    x=[stage['value'] for stage in funnel_data],
-                    textinfo="value+percent initial"
-                ))
-                
-                fig_funnel.update_layout(title="Marketing Funnel Overview")
-                st.plotly_chart(fig_funnel, use_container_width=True)
+                st.plotly_chart(
+                    cached_figure(dataset_key, 'funnel', (), lambda: funnel_figure(totals)),
+                    use_container_width=True
+                )
                 
                 # Cost Analysis
                 st.markdown("#### 💰 Cost Analysis")
@@ -1075,41 +1197,18 @@ elif page == "Campaign Management Hub":
                 
                 with cost_col1:
                     # Cost per Platform Treemap
-                    fig_cost_tree = px.treemap(
-                        df,
-                        path=['platform', 'campaign_type'],
-                        values='cost',
-                        title="Cost Distribution"
-                    )
-                    st.plotly_chart(fig_cost_tree)
+                    st.plotly_chart(cached_figure(dataset_key, 'cost_treemap', (), lambda: cost_treemap_figure(cube)))
                 
                 with cost_col2:
                     # CPC Trends
-                    df['cpc'] = df['cost'] / df['clicks']
-                    fig_cpc = px.line(
-                        df.groupby('date')['cpc'].mean().reset_index(),
-                        x='date',
-                        y='cpc',
-                        title="Cost per Click Trends"
-                    )
-                    st.plotly_chart(fig_cpc)
+                    st.plotly_chart(cached_figure(
+                        dataset_key, 'cpc', (use_webgl, max_points),
+                        lambda: cpc_figure(cube, use_webgl, max_points)
+                    ))
                 
                 with cost_col3:
                     # ROAS by Platform
-                    platform_roas = df.groupby('platform').apply(
-                        lambda x: (x['conversions'].sum() * 50) / x['cost'].sum()
-                    ).reset_index()
-                    platform_roas.columns = ['platform', 'roas']
-                    
-                    fig_roas = px.bar(
-                        platform_roas,
-                        x='platform',
-                        y='roas',
-                        title="Return on Ad Spend by Platform",
-                        text=platform_roas['roas'].round(2)
-                    )
-                    fig_roas.update_traces(texttemplate='%{text}x', textposition='outside')
-                    st.plotly_chart(fig_roas)
+                    st.plotly_chart(cached_figure(dataset_key, 'roas', (), lambda: roas_figure(cube)))
                 
             except Exception as e:
                 st.error(f"Error processing file: {str(e)}")
@@ -1136,6 +1235,8 @@ elif page == "Campaign Management Hub":
             hashtag_count = st.slider("Number of Hashtags", 5, 30, 15)
             include_trending = st.checkbox("Include Trending Hashtags", True)
         
+        reuse_hashtags = st.checkbox("Reuse previous hashtags for repeated prompts", value=True, key="reuse_hashtags")
+        
         if st.button("Generate Hashtags"):
             with st.spinner("Analyzing and generating hashtags..."):
                 prompt = f"""
@@ -1152,51 +1253,17 @@ elif page == "Campaign Management Hub":
                 3. Industry Hashtags
                 4. Engagement Hashtags
                 """
-                hashtags = safe_generate_content(prompt)
+                hashtags = safe_generate_content(prompt, use_cache=reuse_hashtags)
                 if hashtags:
                     st.markdown(hashtags)
 
-# Add helper function for adding captions to images
-def add_caption_to_image(image, caption_text, position, font_size, text_color, bg_opacity):
-    # Create a copy of the image
-    img_with_caption = image.copy()
-    draw = ImageDraw.Draw(img_with_caption, 'RGBA')
-    
-    try:
-        font = ImageFont.truetype("arial.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
-    
-    # Calculate text size and position
-    text_width, text_height = draw.textsize(caption_text, font=font)
-    image_width, image_height = image.size
-    
-    # Calculate position based on selection
-    if position == "Top":
-        x = (image_width - text_width) // 2
-        y = 10
-    elif position == "Bottom":
-        x = (image_width - text_width) // 2
-        y = image_height - text_height - 10
-    else:  # Center
-        x = (image_width - text_width) // 2
-        y = (image_height - text_height) // 2
-    
-    # Draw background rectangle
-    bg_color = (0, 0, 0, int(255 * bg_opacity))
-    padding = 10
-    draw.rectangle(
-        [x - padding, y - padding, x + text_width + padding, y + text_height + padding],
-        fill=bg_color
-    )
-    
-    # Draw text
-    draw.text((x, y), caption_text, font=font, fill=text_color)
-    
-    return img_with_caption
-
 # Add footer
 st.sidebar.markdown("---")
+cache_stats = get_response_cache().stats()
+st.sidebar.caption(
+    f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+    f"({cache_stats['entries']} stored)"
+)
 st.sidebar.markdown("### About")
 st.sidebar.info(
     "This AI Marketing Suite helps marketers create, analyze, and optimize "
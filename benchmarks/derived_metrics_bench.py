@@ -0,0 +1,103 @@
+"""Micro-benchmark: per-chart derived metrics on the raw frame vs. the cube.
+
+    python benchmarks/derived_metrics_bench.py [rows ...]
+
+The legacy path mirrors the dashboard before the derived-metrics module
+(row-level CPC column, Python-loop radar normalisation, groupby().apply
+ROAS). The vectorized path builds the aggregation cube and derives every
+metric from its rollups with NumPy; the last column is the same work on
+an already cached cube, which is what a dashboard rerun pays.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from campaign_analytics import build_cube, rollup  # noqa: E402
+from derived_metrics import derive_metrics, min_max_normalize  # noqa: E402
+
+
+PLATFORMS = ['Instagram', 'Facebook', 'LinkedIn', 'Twitter', 'TikTok']
+CAMPAIGN_TYPES = ['Brand Awareness', 'Lead Generation', 'Sales', 'Content Promotion']
+NORMALIZED = ['impressions', 'engagement', 'clicks', 'conversions']
+
+
+def make_frame(rows, days=365, seed=0):
+    rng = np.random.default_rng(seed)
+    impressions = rng.integers(100, 50000, rows, dtype=np.int32)
+    engagement = (impressions * rng.uniform(0.15, 0.25, rows)).astype(np.int32)
+    clicks = (engagement * rng.uniform(0.0, 0.35, rows)).astype(np.int32)
+    return pd.DataFrame({
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, days, rows), unit='D'),
+        'platform': pd.Categorical.from_codes(rng.integers(0, len(PLATFORMS), rows), PLATFORMS),
+        'campaign_type': pd.Categorical.from_codes(rng.integers(0, len(CAMPAIGN_TYPES), rows), CAMPAIGN_TYPES),
+        'impressions': impressions,
+        'engagement': engagement,
+        'clicks': clicks,
+        'conversions': (clicks * rng.uniform(0.15, 0.25, rows)).astype(np.int32),
+        'cost': (impressions * rng.uniform(0.002, 0.01, rows)).astype(np.float32),
+    })
+
+
+def legacy(df):
+    df = df.copy()  # the old code mutated the shared upload
+    df['cpc'] = df['cost'] / df['clicks']
+    cpc = df.groupby('date')['cpc'].mean()
+
+    platform_metrics = df.groupby('platform', observed=True).agg({
+        'impressions': 'sum', 'engagement': 'sum', 'clicks': 'sum',
+        'conversions': 'sum', 'cost': 'sum'
+    }).reset_index()
+    for metric in NORMALIZED:
+        platform_metrics[f'{metric}_normalized'] = (platform_metrics[metric] - platform_metrics[metric].min()) / \
+                                                 (platform_metrics[metric].max() - platform_metrics[metric].min())
+    radar = []
+    for platform in platform_metrics['platform']:
+        platform_data = platform_metrics[platform_metrics['platform'] == platform]
+        radar.append([platform_data[f'{metric}_normalized'].iloc[0] for metric in NORMALIZED])
+
+    roas = df.groupby('platform', observed=True).apply(
+        lambda x: (x['conversions'].sum() * 50) / x['cost'].sum()
+    )
+    return cpc, radar, roas
+
+
+def vectorized(df):
+    return from_cube(build_cube(df))
+
+
+def from_cube(cube):
+    platform_metrics = rollup(cube, ['platform'])
+    cpc = derive_metrics(rollup(cube, ['date']))['cpc']
+    radar = min_max_normalize(platform_metrics[NORMALIZED].to_numpy())
+    roas = derive_metrics(platform_metrics)['roas']
+    return cpc, radar, roas
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(sizes):
+    print(f"{'rows':>12} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9} {'cached cube (s)':>16}")
+    for rows in sizes:
+        df = make_frame(rows)
+        repeat = 5 if rows <= 1_000_000 else 2
+        old = best_of(legacy, df, repeat)
+        new = best_of(vectorized, df, repeat)
+        # What a rerun pays once the cube is cached: independent of row count
+        cached = best_of(from_cube, build_cube(df), repeat)
+        print(f"{rows:>12,} {old:>12.4f} {new:>15.4f} {old / new:>8.1f}x {cached:>16.4f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000, 10_000_000])
@@ -0,0 +1,240 @@
+"""Load-test benchmark: every Campaign Management Hub stage at growing row counts.
+
+    python benchmarks/hub_pipeline.py [--sizes 1000 100000 ...] [--output results.json]
+    python benchmarks/hub_pipeline.py --check   # exit 1 if a stage breaches its threshold
+    python benchmarks/hub_pipeline.py --workers 4   # also time build_cube_parallel
+
+Fixtures come from generate_campaign_data and are written to CSV once per
+size, so the parse stage reads a real file the way an upload is parsed.
+Before anything is timed, the whole pipeline runs once untimed on a small
+fixture, so one-time costs (Plotly's lazy imports and template set-up) do
+not land in the first size's figures stage. Each stage is then timed
+(best of --repeat, or --large-repeat from LARGE_ROWS rows up) without
+tracing, and run once more under tracemalloc for the peak it allocates on
+top of earlier stages.
+Thresholds live in benchmarks/hub_thresholds.json as
+{rows: {stage: {"seconds": .., "peak_mb": ..}}}.
+With --workers N the multi-core cube runs as an extra cube_parallel stage
+at every size, and its speedup over the serial cube stage is reported.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import campaign_analytics  # noqa: E402
+from campaign_analytics import (  # noqa: E402
+    TrendRollupIndex, build_cube, build_cube_parallel, funnel_stages, kpi_totals, rollup
+)
+from campaign_charts import (  # noqa: E402
+    cost_treemap_figure, cpc_figure, funnel_figure, radar_figure, roas_figure,
+    sunburst_figure, trend_figure
+)
+from campaign_data import CATEGORY_COLUMNS, DASHBOARD_COLUMNS, optimize_dtypes  # noqa: E402
+from derived_metrics import derive_metrics  # noqa: E402
+from downsample import max_points_for_width  # noqa: E402
+from generate_sample_data import generate_campaign_data  # noqa: E402
+
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+# Sizes this large take --large-repeat timed runs instead of --repeat
+LARGE_ROWS = 10_000_000
+WARM_UP_ROWS = 1_000
+FIXTURE_DAYS = 365
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hub_thresholds.json')
+
+
+def fixture_path(rows, fixture_dir):
+    """CSV fixture of about ``rows`` rows, generated on first use"""
+    path = os.path.join(fixture_dir, f'campaign_{rows}.csv')
+    if not os.path.exists(path):
+        # A year at scale 1 gives the rows-per-unit-scale of this generator
+        per_scale = len(generate_campaign_data(FIXTURE_DAYS, seed=0))
+        df = generate_campaign_data(FIXTURE_DAYS, seed=0, campaign_scale=max(rows / per_scale, 0.01))
+        df.head(rows).to_csv(path, index=False)
+    return path
+
+
+def hub_stages(path, workers=0):
+    """(name, fn) pairs in dashboard order; each fn takes the previous stage's state"""
+    max_points = max_points_for_width()
+
+    def parse(state):
+        state['df'] = pd.read_csv(
+            path,
+            usecols=lambda col: col in DASHBOARD_COLUMNS,
+            dtype={col: 'category' for col in CATEGORY_COLUMNS}
+        )
+
+    def date_conversion(state):
+        df = state['df']
+        df['date'] = pd.to_datetime(df['date'])
+        optimize_dtypes(df)
+
+    def cube(state):
+        state['cube'] = build_cube(state['df'])
+
+    def cube_parallel(state):
+        build_cube_parallel(state['df'], workers)
+
+    def kpis(state):
+        state['totals'] = kpi_totals(state['cube'])
+        funnel_stages(state['totals'])
+
+    def resample(state):
+        trend = TrendRollupIndex.from_cube(state['cube'])
+        for granularity in ('Weekly', 'Monthly'):
+            trend.get(granularity)
+        state['trend'] = trend
+
+    def platform_groupby(state):
+        state['platform'] = rollup(state['cube'], ['platform'])
+        rollup(state['cube'], ['platform', 'campaign_type'])
+
+    def roas(state):
+        derive_metrics(state['platform'])['roas']
+
+    def figures(state):
+        cube = state['cube']
+        trend_figure(state['trend'].get('Daily').reset_index(), ['impressions', 'engagement'], False, max_points)
+        radar_figure(cube)
+        sunburst_figure(cube)
+        funnel_figure(state['totals'])
+        cost_treemap_figure(cube)
+        cpc_figure(cube, False, max_points)
+        roas_figure(cube)
+
+    stages = [
+        ('parse', parse), ('date_conversion', date_conversion), ('cube', cube), ('kpis', kpis),
+        ('resample', resample), ('platform_groupby', platform_groupby), ('roas', roas),
+        ('figures', figures),
+    ]
+    if workers > 1:
+        stages.insert(3, ('cube_parallel', cube_parallel))
+    return stages
+
+
+def run_pipeline(path, repeat, workers=0):
+    """Best wall time and traced peak memory per stage"""
+    seconds = {}
+    for _ in range(repeat):
+        state = {}
+        for name, fn in hub_stages(path, workers):
+            start = time.perf_counter()
+            fn(state)
+            elapsed = time.perf_counter() - start
+            seconds[name] = min(elapsed, seconds.get(name, elapsed))
+        del state
+
+    peaks = {}
+    state = {}
+    tracemalloc.start()
+    try:
+        for name, fn in hub_stages(path, workers):
+            # Peak above what earlier stages left allocated
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn(state)
+            peaks[name] = (tracemalloc.get_traced_memory()[1] - baseline) / 1e6
+    finally:
+        tracemalloc.stop()
+    rows = len(state['df'])
+    del state
+    return rows, [
+        dict(stage=name, seconds=round(seconds[name], 6), peak_mb=round(peaks[name], 3))
+        for name, _ in hub_stages(path, workers)
+    ]
+
+
+def warm_up(fixture_dir, workers=0):
+    """Run every stage once, untimed, so import and first-use costs are paid up front"""
+    state = {}
+    for _, fn in hub_stages(fixture_path(WARM_UP_ROWS, fixture_dir), workers):
+        fn(state)
+
+
+def check(results, thresholds):
+    """Human-readable threshold breaches; empty when everything is within budget"""
+    failures = []
+    for result in results:
+        for stage in result['stages']:
+            limits = thresholds.get(str(result['target_rows']), {}).get(stage['stage'], {})
+            for metric in ('seconds', 'peak_mb'):
+                if metric in limits and stage[metric] > limits[metric]:
+                    failures.append(
+                        f"{result['target_rows']:,} rows / {stage['stage']}: "
+                        f"{metric} {stage[metric]} > {limits[metric]}"
+                    )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per size (best is kept)")
+    parser.add_argument('--large-repeat', type=int, default=1,
+                        help=f"timed runs for sizes of {LARGE_ROWS:,} rows or more")
+    parser.add_argument('--fixture-dir', default=os.path.join(tempfile.gettempdir(), 'hub_pipeline_fixtures'))
+    parser.add_argument('--output', help="write JSON results here instead of stdout")
+    parser.add_argument('--check', action='store_true', help="compare against the thresholds file")
+    parser.add_argument('--thresholds', default=THRESHOLDS_PATH)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="also time build_cube_parallel with this many processes (0: skip)")
+    args = parser.parse_args()
+
+    os.makedirs(args.fixture_dir, exist_ok=True)
+    if args.workers > 1:
+        # Measure the pool at every size, and start its workers before timing
+        campaign_analytics.PARALLEL_MIN_ROWS = 0
+        build_cube_parallel(generate_campaign_data(7, seed=0), args.workers)
+    warm_up(args.fixture_dir, args.workers)
+    results = []
+    for size in args.sizes:
+        path = fixture_path(size, args.fixture_dir)
+        rows, stages = run_pipeline(path, args.repeat if size < LARGE_ROWS else args.large_repeat, args.workers)
+        result = dict(target_rows=size, rows=rows, stages=stages)
+        seconds = {stage['stage']: stage['seconds'] for stage in stages}
+        if 'cube_parallel' in seconds:
+            result['parallel'] = dict(
+                workers=args.workers, speedup=round(seconds['cube'] / seconds['cube_parallel'], 2)
+            )
+        results.append(result)
+        total = sum(stage['seconds'] for stage in stages)
+        print(f"{rows:>12,} rows  {total:8.3f}s  "
+              + "  ".join(f"{s['stage']}={s['seconds']:.3f}s/{s['peak_mb']:.0f}MB" for s in stages)
+              + (f"  speedup={result['parallel']['speedup']}x" if 'parallel' in result else ""),
+              file=sys.stderr)
+
+    report = dict(
+        meta=dict(
+            python=platform.python_version(), pandas=pd.__version__, numpy=np.__version__,
+            machine=platform.machine(), cpus=os.cpu_count(), timestamp=time.strftime('%Y-%m-%dT%H:%M:%S')
+        ),
+        results=results,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.check:
+        with open(args.thresholds) as f:
+            failures = check(results, json.load(f))
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from campaign_data import (
+    CATEGORY_COLUMNS, FrameCache, content_key, file_key, iter_campaign_chunks, resolve_data_path
+)
+
+
+CUBE_DIMENSIONS = ['date', 'platform', 'campaign_type']
+METRIC_COLUMNS = ['impressions', 'engagement', 'clicks', 'conversions', 'cost']
+REVENUE_PER_CONVERSION = 50
+
+# Below this many rows a process pool costs more than it saves
+PARALLEL_MIN_ROWS = int(os.getenv('CAMPAIGN_PARALLEL_MIN_ROWS', 5_000_000))
+PARALLEL_WORKERS = int(os.getenv('CAMPAIGN_PARALLEL_WORKERS', os.cpu_count() or 1))
+
+
+def _factorize(series):
+    """Integer codes (-1 for missing) and sorted labels for one cube dimension"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series, sort=True)
+
+
+def _dimension_codes(df, dimensions):
+    """(codes, labels) per dimension and the shape of the cell space they span"""
+    factorized = [_factorize(df[col]) for col in dimensions]
+    return factorized, tuple(len(labels) for _, labels in factorized)
+
+
+def _cube_frame(df, dimensions, factorized, shape, observed, sums):
+    """Cube rows for the ``observed`` cell ids, given each metric's per-cell sums"""
+    cube = {}
+    for col, index, (_, labels) in zip(dimensions, np.unravel_index(observed, shape), factorized):
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            cube[col] = pd.Categorical.from_codes(index, dtype=df[col].dtype)
+        else:
+            cube[col] = labels.take(index)
+    for col, values in sums.items():
+        cube[col] = values if col == 'cost' else values.round().astype('int64')
+    return pd.DataFrame(cube)
+
+
+def build_cube(df):
+    """Aggregate raw rows into a (date, platform, campaign_type) cube in one pass.
+
+    Every dashboard chart and KPI is a re-aggregation of this cube, which
+    has at most days x platforms x campaign types rows however large the
+    upload is.
+    """
+    dimensions = [col for col in CUBE_DIMENSIONS if col in df.columns]
+    metrics = [col for col in METRIC_COLUMNS if col in df.columns]
+
+    # Combine the per-dimension codes into one mixed-radix cell id per row
+    factorized, shape = _dimension_codes(df, dimensions)
+    cell = np.zeros(len(df), dtype='int64')
+    valid = np.ones(len(df), dtype=bool)
+    for (codes, _), size in zip(factorized, shape):
+        cell = cell * size + codes
+        valid &= codes >= 0
+    if not valid.all():
+        # Rows with a missing key are dropped, as groupby would
+        cell = cell[valid]
+
+    n_cells = int(np.prod(shape, dtype='int64'))
+    if n_cells <= max(len(cell), 1_000_000):
+        # Dense cell space: count per cell, keep only the observed ones
+        observed = np.flatnonzero(np.bincount(cell, minlength=n_cells))
+        position = cell
+    else:
+        # Too many combinations to allocate densely; compact first
+        observed, position = np.unique(cell, return_inverse=True)
+
+    # bincount accumulates in float64, so float32 cost does not drift and
+    # int32 counts cannot overflow
+    sums = {}
+    for col in metrics:
+        values = df[col].to_numpy('float64', na_value=0.0)
+        if not valid.all():
+            values = values[valid]
+        col_sums = np.bincount(position, weights=values, minlength=n_cells if position is cell else len(observed))
+        sums[col] = col_sums[observed] if position is cell else col_sums
+    return _cube_frame(df, dimensions, factorized, shape, observed, sums)
+
+
+def merge_cubes(cubes):
+    """Combine partial cubes (from chunks or partitions) into one cube.
+
+    The cells of all partials are summed again, so the result equals the
+    cube of the concatenated rows.
+    """
+    merged = pd.concat(cubes, ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        # Partials with different category sets concatenate as object; restore
+        # the sorted categorical the single-pass path produces
+        if col in merged.columns and not isinstance(merged[col].dtype, pd.CategoricalDtype):
+            merged[col] = merged[col].astype(pd.CategoricalDtype(sorted(merged[col].dropna().unique())))
+    return build_cube(merged)
+
+
+def _shared_views(buf, layout, n_rows):
+    return {name: np.ndarray(n_rows, dtype=dtype, buffer=buf, offset=offset) for name, dtype, offset in layout}
+
+
+def _fill_shared(buf, layout, n_rows, df, dimensions, factorized, metrics):
+    """Copy the dimension codes and metric columns into ``buf``"""
+    views = _shared_views(buf, layout, n_rows)
+    for col, (codes, _) in zip(dimensions, factorized):
+        np.copyto(views[col], codes, casting='unsafe')
+    for col in metrics:
+        view = views[col]
+        values = df[col].to_numpy()
+        if values.dtype != view.dtype:
+            values = df[col].to_numpy('float64', na_value=0.0)
+        np.copyto(view, values)
+        if view.dtype.kind == 'f':
+            np.nan_to_num(view, copy=False)
+
+
+def _bincount_rows(buf, layout, n_rows, start, stop, shape):
+    views = [(name, view[start:stop]) for name, view in _shared_views(buf, layout, n_rows).items()]
+    n_cells = int(np.prod(shape, dtype='int64'))
+
+    # Mixed-radix cell id per row, as in build_cube; rows with a missing key
+    # land in one extra cell that is never reported
+    cell = np.zeros(stop - start, dtype='int64')
+    missing = np.zeros(stop - start, dtype=bool)
+    for (_, codes), size in zip(views, shape):
+        cell *= size
+        cell += codes
+        missing |= codes < 0
+    cell[missing] = n_cells
+
+    counts = np.bincount(cell, minlength=n_cells + 1)[:n_cells]
+    observed = np.flatnonzero(counts)
+    sums = {
+        col: np.bincount(cell, weights=view, minlength=n_cells + 1)[observed]
+        for col, view in views[len(shape):]
+    }
+    return observed, counts[observed], sums
+
+
+def _bincount_shared(shm_name, layout, n_rows, start, stop, shape):
+    """Process-pool worker: per-cell row counts and metric sums for one row range"""
+    # Pool workers share the parent's resource tracker, so attaching here does
+    # not hand ownership over; the parent unlinks the segment
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # The array views die with the helper's frame, which the segment
+        # needs before it can be closed
+        return _bincount_rows(shm.buf, layout, n_rows, start, stop, shape)
+    finally:
+        shm.close()
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(workers):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool._max_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            # Forking a multi-threaded Streamlit server is unsafe; start clean workers
+            _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _process_pool
+
+
+def build_cube_parallel(df, workers=None):
+    """build_cube across a process pool, one contiguous row range per worker.
+
+    The parent factorizes each dimension once and copies the codes (in the
+    smallest integer type that holds them) and the metric columns (in their
+    own dtypes) into a shared memory segment as plain numpy buffers. Each
+    worker derives the cell ids and bincounts its row range in place, and
+    returns only the cells it observed, which are summed into the cube.
+    Falls back to build_cube with one worker, for frames too small to
+    benefit, and for cell spaces too sparse to count densely.
+    """
+    workers = workers or PARALLEL_WORKERS
+    if workers < 2 or len(df) < PARALLEL_MIN_ROWS:
+        return build_cube(df)
+
+    dimensions = [col for col in CUBE_DIMENSIONS if col in df.columns]
+    metrics = [col for col in METRIC_COLUMNS if col in df.columns]
+    factorized, shape = _dimension_codes(df, dimensions)
+    n_cells = int(np.prod(shape, dtype='int64'))
+    n_rows = len(df)
+    if n_cells > n_rows:
+        return build_cube(df)
+
+    # Numeric metrics are shared as-is; anything else (nullable, object) as float64
+    dtypes = [np.min_scalar_type(-len(labels)) for _, labels in factorized]
+    for col in metrics:
+        dtype = df[col].dtype
+        dtypes.append(dtype if isinstance(dtype, np.dtype) and dtype.kind in 'iuf' else np.dtype('float64'))
+    layout, offset = [], 0
+    for name, dtype in zip(dimensions + metrics, dtypes):
+        layout.append((name, dtype.str, offset))
+        offset += -(-n_rows * dtype.itemsize // 8) * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        _fill_shared(shm.buf, layout, n_rows, df, dimensions, factorized, metrics)
+        bounds = np.linspace(0, n_rows, workers + 1).astype('int64')
+        pool = _get_process_pool(workers)
+        futures = [
+            pool.submit(_bincount_shared, shm.name, layout, n_rows, int(start), int(stop), shape)
+            for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+        ]
+        partials = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    counts = np.zeros(n_cells, dtype='int64')
+    sums = {col: np.zeros(n_cells) for col in metrics}
+    for observed, partial_counts, partial_sums in partials:
+        # Cells are unique within a partial, so fancy-index adds are exact
+        counts[observed] += partial_counts
+        for col in metrics:
+            sums[col][observed] += partial_sums[col]
+    observed = np.flatnonzero(counts)
+    return _cube_frame(df, dimensions, factorized, shape, observed, {col: sums[col][observed] for col in metrics})
+
+
+def aggregate_chunks(chunks):
+    """Fold an iterable of raw-row frames into a cube one chunk at a time.
+
+    Only the current chunk and the running cube (at most days x platforms x
+    campaign types cells) are alive at any point, whatever the input size.
+    """
+    cube = None
+    for chunk in chunks:
+        partial = build_cube(chunk)
+        del chunk
+        cube = partial if cube is None else merge_cubes([cube, partial])
+    if cube is None:
+        raise ValueError("Campaign file contains no rows")
+    return cube
+
+
+def rollup(cube, by):
+    """Re-aggregate the cube over a subset of its dimensions"""
+    metrics = [col for col in METRIC_COLUMNS if col in cube.columns]
+    return cube.groupby(by, observed=True, sort=True)[metrics].sum().reset_index()
+
+
+def kpi_totals(cube):
+    """Grand totals of every metric as a Series"""
+    return cube[[col for col in METRIC_COLUMNS if col in cube.columns]].sum()
+
+
+def funnel_stages(totals):
+    return [
+        dict(name="Impressions", value=totals['impressions']),
+        dict(name="Engagement", value=totals['engagement']),
+        dict(name="Clicks", value=totals['clicks']),
+        dict(name="Conversions", value=totals['conversions'])
+    ]
+
+
+class TrendRollupIndex:
+    """Daily metric totals plus weekly and monthly rollups derived from them.
+
+    New dated rows are folded in incrementally: they are summed per day and
+    that (small) daily delta is added to every granularity already built,
+    so switching granularity never touches the raw data again.
+    """
+
+    FREQUENCIES = {'Weekly': 'W', 'Monthly': 'M'}
+
+    def __init__(self, metrics=METRIC_COLUMNS):
+        self.metrics = list(metrics)
+        self.daily = pd.DataFrame(columns=self.metrics, index=pd.DatetimeIndex([], name='date'))
+        self._rollups = {}
+
+    @classmethod
+    def from_cube(cls, cube):
+        index = cls([col for col in METRIC_COLUMNS if col in cube.columns])
+        index.update(cube)
+        return index
+
+    def _restore_dtypes(self, frame):
+        # add(fill_value=0) widens counts to float; put them back
+        return frame.astype({col: 'float64' if col == 'cost' else 'int64' for col in self.metrics})
+
+    def update(self, rows):
+        """Fold raw rows or cube cells with a ``date`` column into the index"""
+        if len(rows) == 0:
+            return
+        delta = rows.groupby(rows['date'].dt.normalize().rename('date'))[self.metrics].sum()
+        self.daily = self._restore_dtypes(self.daily.add(delta, fill_value=0))
+        for granularity, frame in self._rollups.items():
+            freq = self.FREQUENCIES[granularity]
+            merged = frame.add(delta.resample(freq).sum(), fill_value=0)
+            # Keep empty buckets between old and new data, as resample would
+            self._rollups[granularity] = self._restore_dtypes(merged.asfreq(freq, fill_value=0))
+
+    def get(self, granularity):
+        """Metric totals per Daily, Weekly or Monthly bucket, indexed by date"""
+        if granularity == 'Daily':
+            return self.daily
+        if granularity not in self._rollups:
+            self._rollups[granularity] = self.daily.resample(self.FREQUENCIES[granularity]).sum()
+        return self._rollups[granularity]
+
+    def nbytes(self):
+        frames = [self.daily, *self._rollups.values()]
+        return int(sum(frame.memory_usage(deep=True).sum() for frame in frames))
+
+
+cube_cache = FrameCache(max_bytes=64 * 1024 * 1024)
+trend_cache = FrameCache(max_bytes=16 * 1024 * 1024)
+
+
+def get_cube(dataset_key, df, parallel=False):
+    """Cube for a loaded dataset, built once per dataset key"""
+    cube = cube_cache.get(dataset_key)
+    if cube is None:
+        cube = build_cube_parallel(df) if parallel else build_cube(df)
+        cube_cache.set(dataset_key, cube)
+    return cube
+
+
+def load_campaign_cube(source, chunk_rows=None):
+    """Return (key, cube) for an upload or a server-side path, streaming the rows.
+
+    The raw rows are never kept, so this is the path for files that do not
+    fit in memory; the cube is cached under the same key scheme as get_cube.
+    Paths are resolved inside CAMPAIGN_DATA_DIR and rejected outside it.
+    """
+    if isinstance(source, str):
+        source = resolve_data_path(source)
+        key, filename = file_key(source), source.lower()
+    else:
+        key, filename = content_key(source), source.name.lower()
+
+    cube = cube_cache.get(key)
+    if cube is None:
+        kwargs = {} if chunk_rows is None else {'chunk_rows': chunk_rows}
+        if isinstance(source, str):
+            with open(source, 'rb') as file:
+                cube = aggregate_chunks(iter_campaign_chunks(file, filename, **kwargs))
+        else:
+            source.seek(0)
+            cube = aggregate_chunks(iter_campaign_chunks(source, filename, **kwargs))
+        cube_cache.set(key, cube)
+    return key, cube
+
+
+def get_trend_index(dataset_key, cube):
+    """Trend rollups for a loaded dataset, built from its cube once per key"""
+    index = trend_cache.get(dataset_key)
+    if index is None:
+        index = TrendRollupIndex.from_cube(cube)
+        trend_cache.set(dataset_key, index, nbytes=index.nbytes())
+    return index
@@ -0,0 +1,172 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from campaign_analytics import funnel_stages, rollup
+from derived_metrics import derive_metrics, min_max_normalize
+from downsample import downsample
+
+
+RADAR_METRICS = ['impressions', 'engagement', 'clicks', 'conversions']
+
+
+def trend_figure(df_trend, selected_metrics, use_webgl, max_points):
+    # Each trace is capped at roughly one point per horizontal pixel
+    trace_type = go.Scattergl if use_webgl else go.Scatter
+    fig = go.Figure()
+    for metric in selected_metrics:
+        trend_x, trend_y = downsample(df_trend['date'], df_trend[metric], max_points)
+        fig.add_trace(trace_type(
+            x=trend_x,
+            y=trend_y,
+            name=metric.capitalize(),
+            mode='lines+markers',
+            line=dict(width=3),
+            marker=dict(size=8)
+        ))
+    fig.update_layout(
+        title="Metric Trends Over Time",
+        xaxis_title="Date",
+        yaxis_title="Value",
+        hovermode='x unified',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    return fig
+
+
+def radar_figure(cube):
+    platform_metrics = rollup(cube, ['platform'])
+
+    # Normalize all metrics for radar chart in one array operation
+    normalized = min_max_normalize(platform_metrics[RADAR_METRICS].to_numpy())
+
+    fig = go.Figure()
+    for platform, platform_values in zip(platform_metrics['platform'], normalized):
+        fig.add_trace(go.Scatterpolar(
+            r=platform_values,
+            theta=RADAR_METRICS,
+            name=platform,
+            fill='toself'
+        ))
+
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
+        showlegend=True,
+        title="Platform Performance Comparison"
+    )
+    return fig
+
+
+def _hierarchy(cube):
+    """Platform/type totals with plain string labels.
+
+    Plotly groups path columns with observed=False, so categorical labels
+    would add a zero-value node for every platform/type pair never seen.
+    """
+    return rollup(cube, ['platform', 'campaign_type']).astype({'platform': str, 'campaign_type': str})
+
+
+def sunburst_figure(cube):
+    return px.sunburst(
+        _hierarchy(cube),
+        path=['platform', 'campaign_type'],
+        values='impressions',
+        title="Campaign Distribution by Platform and Type"
+    )
+
+
+def funnel_figure(totals):
+    funnel_data = funnel_stages(totals)
+    fig = go.Figure(go.Funnel(
+        y=[stage['name'] for stage in funnel_data],
+        x=[stage['value'] for stage in funnel_data],
+        textinfo="value+percent initial"
+    ))
+    fig.update_layout(title="Marketing Funnel Overview")
+    return fig
+
+
+def cost_treemap_figure(cube):
+    return px.treemap(
+        _hierarchy(cube),
+        path=['platform', 'campaign_type'],
+        values='cost',
+        title="Cost Distribution"
+    )
+
+
+def cpc_figure(cube, use_webgl, max_points):
+    # CPC Trends (daily spend over daily clicks)
+    daily_metrics = rollup(cube, ['date'])
+    cpc_x, cpc_y = downsample(daily_metrics['date'], derive_metrics(daily_metrics)['cpc'], max_points)
+    return px.line(
+        x=cpc_x,
+        y=cpc_y,
+        labels={'x': 'date', 'y': 'cpc'},
+        title="Cost per Click Trends",
+        render_mode='webgl' if use_webgl else 'svg'
+    )
+
+
+def roas_figure(cube):
+    platform_metrics = rollup(cube, ['platform'])
+    platform_roas = pd.DataFrame({
+        'platform': platform_metrics['platform'],
+        'roas': derive_metrics(platform_metrics)['roas']
+    })
+
+    fig = px.bar(
+        platform_roas,
+        x='platform',
+        y='roas',
+        title="Return on Ad Spend by Platform",
+        text=platform_roas['roas'].round(2)
+    )
+    fig.update_traces(texttemplate='%{text}x', textposition='outside')
+    return fig
+
+
+class FigureCache:
+    """LRU cache of built figures keyed by (dataset key, chart id, options).
+
+    st.plotly_chart serialises a Figure without re-validating it, so reusing
+    the object skips both the aggregation and Plotly's validation for every
+    chart whose inputs did not change.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, dataset_key, chart_id, options, build):
+        key = (dataset_key, chart_id, options)
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                return fig
+
+        fig = build()
+        with self._lock:
+            self._figures[key] = fig
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return fig
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(dataset_key, chart_id, options, build):
+    """Shared-cache shortcut; ``options`` must be hashable"""
+    return figure_cache.get_or_build(dataset_key, chart_id, options, build)
@@ -0,0 +1,218 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from sized_cache import SizedLRUCache
+
+
+# Only these columns are charted, so columnar formats read nothing else
+DASHBOARD_COLUMNS = [
+    'date', 'platform', 'campaign_type',
+    'impressions', 'engagement', 'clicks', 'conversions', 'cost'
+]
+COLUMNAR_EXTENSIONS = ('.parquet', '.feather', '.arrow')
+# Formats that can be read a slice at a time in streaming mode
+STREAMABLE_EXTENSIONS = ('.csv', '.jsonl') + COLUMNAR_EXTENSIONS
+
+CATEGORY_COLUMNS = ['platform', 'campaign_type']
+COUNT_COLUMNS = ['impressions', 'engagement', 'clicks', 'conversions']
+COST_COLUMNS = ['cost']
+
+DEFAULT_CACHE_BYTES = int(os.getenv('CAMPAIGN_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+CHUNK_ROWS = int(os.getenv('CAMPAIGN_CHUNK_ROWS', 250_000))
+# Server-side reads are confined to this directory; unset disables them
+CAMPAIGN_DATA_DIR = os.getenv('CAMPAIGN_DATA_DIR')
+
+
+def optimize_dtypes(df):
+    """Shrink campaign columns in place: categorical labels, int32 counts, float32 cost"""
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype != 'category':
+            df[col] = df[col].astype('category')
+        elif col in df.columns and not df[col].cat.categories.is_monotonic_increasing:
+            # Arrow dictionaries keep first-seen order; sort so every format
+            # (and every chunk) orders labels the same way
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+
+    int32_max = np.iinfo(np.int32).max
+    for col in COUNT_COLUMNS:
+        # Columns with gaps or huge values keep their wider dtype
+        if col in df.columns and df[col].notna().all() and df[col].abs().max() <= int32_max:
+            df[col] = df[col].astype('int32')
+
+    for col in COST_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    return df
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow uploads need pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _open_ipc_projected(file, columns):
+    """Arrow IPC reader that decodes only ``columns``, plus their names in order.
+
+    The footer is read once for the schema, then the file is reopened with
+    included_fields so unused columns are never read from the buffer.
+    """
+    import pyarrow.ipc
+
+    names = pyarrow.ipc.open_file(file).schema.names
+    selected = [col for col in columns if col in names]
+    options = pyarrow.ipc.IpcReadOptions(included_fields=[names.index(col) for col in selected])
+    return pyarrow.ipc.open_file(file, options=options), selected
+
+
+def read_columnar(file, filename, columns=DASHBOARD_COLUMNS):
+    """Read a Parquet or Arrow IPC/Feather file, projecting to ``columns``"""
+    _require_pyarrow()
+    import pyarrow.parquet
+
+    if filename.endswith('.parquet'):
+        parquet_file = pyarrow.parquet.ParquetFile(file)
+        names = parquet_file.schema_arrow.names
+        table = parquet_file.read(columns=[col for col in columns if col in names])
+    else:  # Feather v2 is the Arrow IPC file format
+        reader, selected = _open_ipc_projected(file, columns)
+        table = reader.read_all().select(selected)
+
+    # Strings arrive as pandas categoricals without an intermediate object column
+    return table.to_pandas(strings_to_categorical=True)
+
+
+def parse_campaign_file(file, filename):
+    """Parse an uploaded campaign export into a compact frame of the charted columns"""
+    if filename.endswith('.csv'):
+        df = pd.read_csv(
+            file,
+            usecols=lambda col: col in DASHBOARD_COLUMNS,
+            dtype={col: 'category' for col in CATEGORY_COLUMNS}
+        )
+    elif filename.endswith('.xlsx'):
+        df = pd.read_excel(file, usecols=lambda col: col in DASHBOARD_COLUMNS)
+    elif filename.endswith(COLUMNAR_EXTENSIONS):
+        df = read_columnar(file, filename)
+    elif filename.endswith('.jsonl'):
+        df = pd.read_json(file, lines=True)
+        df = df.drop(columns=[col for col in df.columns if col not in DASHBOARD_COLUMNS])
+    else:  # JSON
+        df = pd.read_json(file)
+        df = df.drop(columns=[col for col in df.columns if col not in DASHBOARD_COLUMNS])
+
+    # Convert date column to datetime
+    df['date'] = pd.to_datetime(df['date'])
+    return optimize_dtypes(df)
+
+
+def _iter_columnar_batches(file, filename, chunk_rows, columns=DASHBOARD_COLUMNS):
+    _require_pyarrow()
+    import pyarrow.parquet
+
+    if filename.endswith('.parquet'):
+        parquet_file = pyarrow.parquet.ParquetFile(file)
+        names = parquet_file.schema_arrow.names
+        batches = parquet_file.iter_batches(
+            batch_size=chunk_rows, columns=[col for col in columns if col in names]
+        )
+    else:
+        reader, selected = _open_ipc_projected(file, columns)
+        # IPC files are already split into record batches; read them one at a time
+        batches = (reader.get_batch(i).select(selected) for i in range(reader.num_record_batches))
+
+    for batch in batches:
+        yield batch.to_pandas(strings_to_categorical=True)
+
+
+def iter_campaign_chunks(file, filename, chunk_rows=CHUNK_ROWS):
+    """Yield a campaign file as parsed frames of at most ``chunk_rows`` rows.
+
+    Each chunk gets the same column projection and dtypes as
+    parse_campaign_file, so only one chunk is ever held in memory.
+    """
+    if filename.endswith('.csv'):
+        chunks = pd.read_csv(
+            file,
+            usecols=lambda col: col in DASHBOARD_COLUMNS,
+            dtype={col: 'category' for col in CATEGORY_COLUMNS},
+            chunksize=chunk_rows
+        )
+    elif filename.endswith('.jsonl'):
+        chunks = pd.read_json(file, lines=True, chunksize=chunk_rows)
+    elif filename.endswith(COLUMNAR_EXTENSIONS):
+        chunks = _iter_columnar_batches(file, filename, chunk_rows)
+    else:
+        raise ValueError(
+            "Streaming mode reads CSV, JSON-lines, Parquet and Arrow/Feather files; "
+            "convert Excel or JSON arrays first"
+        )
+
+    for chunk in chunks:
+        chunk = chunk.drop(columns=[col for col in chunk.columns if col not in DASHBOARD_COLUMNS])
+        chunk['date'] = pd.to_datetime(chunk['date'])
+        yield optimize_dtypes(chunk)
+
+
+class FrameCache(SizedLRUCache):
+    """LRU cache of parsed frames bounded by their total in-memory size.
+
+    Unlike st.cache_data this hands back the cached frame itself rather than
+    an unpickled copy, so callers must treat the result as read-only.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        super().__init__(max_bytes)
+
+    def set(self, key, df, nbytes=None):
+        if nbytes is None:
+            nbytes = int(df.memory_usage(deep=True).sum())
+        super().set(key, df, nbytes)
+
+
+frame_cache = FrameCache()
+
+
+def content_key(uploaded_file):
+    """Hash of the upload's bytes plus its extension, which selects the parser"""
+    digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    return f"{digest}{os.path.splitext(uploaded_file.name)[1].lower()}"
+
+
+def resolve_data_path(path, data_dir=None):
+    """Real path of ``path`` inside the campaign data directory.
+
+    Symlinks and ``..`` are resolved before the containment check. Missing
+    files and paths outside the directory raise the same ValueError, so the
+    message does not reveal which files exist elsewhere on the server.
+    """
+    data_dir = data_dir or CAMPAIGN_DATA_DIR
+    if not data_dir:
+        raise ValueError("Reading server-side files is disabled")
+    root = os.path.realpath(data_dir)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root or not os.path.isfile(resolved):
+        raise ValueError("No such campaign file in the data directory")
+    return resolved
+
+
+def file_key(path):
+    """Cheap identity for a server-side file: hashing gigabytes per rerun is not"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_campaign_data(uploaded_file):
+    """Return (key, frame) for an upload, parsing it only the first time it is seen"""
+    key = content_key(uploaded_file)
+    df = frame_cache.get(key)
+    if df is None:
+        uploaded_file.seek(0)
+        df = parse_campaign_file(uploaded_file, uploaded_file.name)
+        frame_cache.set(key, df)
+    return key, df
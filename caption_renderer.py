@@ -0,0 +1,360 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont, ImageOps
+
+from sized_cache import SizedLRUCache
+
+
+# First font that loads wins; Arial is rarely present on Linux hosts
+FONT_CANDIDATES = [
+    path for path in (
+        os.getenv('CAPTION_FONT'),
+        'arialbd.ttf',
+        'arial.ttf',
+        'DejaVuSans-Bold.ttf',
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+        '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
+        '/Library/Fonts/Arial Bold.ttf',
+    ) if path
+]
+
+# Longest side of the proxy that interactive previews are drawn on
+PREVIEW_MAX_SIDE = int(os.getenv('CAPTION_PREVIEW_MAX_SIDE', 1024))
+# Budget for decoded base images; a 12 MP RGB photo takes about 36 MB
+BASE_CACHE_BYTES = int(os.getenv('CAPTION_BASE_CACHE_BYTES', 96 * 1024 * 1024))
+
+POSITIONS = ["Top", "Bottom", "Center", "Top-Left", "Top-Right", "Bottom-Left", "Bottom-Right"]
+
+CaptionStyle = namedtuple('CaptionStyle', [
+    'position', 'size', 'text_color', 'bg_color', 'text_opacity', 'bg_opacity',
+    'padding', 'margin', 'bottom_margin', 'stroke_width'
+])
+# Defaults match the Post Image Generator overlay
+CaptionStyle.__new__.__defaults__ = (
+    "Bottom", 30, "#FFFFFF", "#000000", 1.0, 0.7, 20, 20, 40, 1
+)
+
+
+@lru_cache(maxsize=64)
+def load_font(path, size):
+    """FreeType font for (path, size); parsed once per process"""
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=64)
+def get_font(size):
+    """First loadable candidate at ``size``, else Pillow's built-in font"""
+    for path in FONT_CANDIDATES:
+        try:
+            return load_font(path, size)
+        except OSError:
+            continue
+    try:
+        # Pillow >= 10.1 ships a scalable default font
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def image_digest(image):
+    """Content hash of a decoded image, for keying rendered variants"""
+    digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    """Content hash of an encoded image; keys it without decoding"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def caption_origin(image_size, text_size, style):
+    """Top-left corner of the caption text for ``style.position``"""
+    width, height = image_size
+    text_width, text_height = text_size
+    margin, bottom = style.margin, style.bottom_margin
+    position_map = {
+        "Top": ((width - text_width) // 2, margin),
+        "Bottom": ((width - text_width) // 2, height - text_height - bottom),
+        "Center": ((width - text_width) // 2, (height - text_height) // 2),
+        "Top-Left": (margin, margin),
+        "Top-Right": (width - text_width - margin, margin),
+        "Bottom-Left": (margin, height - text_height - bottom),
+        "Bottom-Right": (width - text_width - margin, height - text_height - bottom)
+    }
+    return position_map.get(style.position, (margin, margin))
+
+
+def scale_style(style, factor):
+    """Style with every pixel measurement scaled, for drawing on a resized proxy"""
+    if factor == 1:
+        return style
+    return style._replace(
+        size=max(1, round(style.size * factor)),
+        padding=round(style.padding * factor),
+        margin=round(style.margin * factor),
+        bottom_margin=round(style.bottom_margin * factor),
+        stroke_width=round(style.stroke_width * factor)
+    )
+
+
+def draw_caption(image, caption, style):
+    """Return a copy of ``image`` with the caption box and text drawn on it.
+
+    The text is drawn once with a stroke in its own colour, which gives the
+    same heavier weight as overdrawing it at four offsets.
+    """
+    captioned = image.copy()
+    draw = ImageDraw.Draw(captioned, 'RGBA')
+    font = get_font(style.size)
+
+    left, top, right, bottom = draw.textbbox((0, 0), caption, font=font, stroke_width=style.stroke_width)
+    text_width, text_height = right - left, bottom - top
+    x, y = caption_origin(captioned.size, (text_width, text_height), style)
+
+    bg_rgba = (*ImageColor.getrgb(style.bg_color)[:3], int(255 * style.bg_opacity))
+    padding = style.padding
+    draw.rectangle(
+        [x - padding, y - padding, x + text_width + padding, y + text_height + padding],
+        fill=bg_rgba
+    )
+
+    text_rgba = (*ImageColor.getrgb(style.text_color)[:3], int(255 * style.text_opacity))
+    # Offset by the bbox origin so the glyphs sit inside the box exactly
+    draw.text(
+        (x - left, y - top), caption, font=font, fill=text_rgba,
+        stroke_width=style.stroke_width, stroke_fill=text_rgba
+    )
+    return captioned
+
+
+class CaptionRenderer:
+    """Memoizes captioned images by (image key, caption, style).
+
+    Base images are decoded once per path or buffer while they fit the
+    ``base_bytes`` budget, and each distinct overlay is drawn once, so a
+    rerun with unchanged inputs, or a slider moved back, costs a dictionary
+    lookup.
+    """
+
+    def __init__(self, max_entries=16, max_bases=8, base_bytes=BASE_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bases = max_bases
+        self._rendered = OrderedDict()
+        self._encoded = OrderedDict()
+        self._previews = OrderedDict()   # (digest, max side) -> (proxy, proxy key, factor)
+        self._bases = SizedLRUCache(base_bytes)   # path or bytes hash -> (mtime, image, digest)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _remember(cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def load_base(self, source):
+        """Decoded image and its digest for a file path or encoded bytes.
+
+        The digest is the hash of the encoded bytes, so decoded pixels are
+        never hashed. Paths are re-read only when the file changes; bytes
+        are keyed by their hash, so the same buffer is decoded once.
+        """
+        if isinstance(source, str):
+            cache_key, version = source, os.path.getmtime(source)
+        else:
+            cache_key, version = bytes_digest(source), None
+        entry = self._bases.get(cache_key)
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+
+        if isinstance(source, str):
+            with open(source, 'rb') as file:
+                source = file.read()
+            digest = bytes_digest(source)
+        else:
+            digest = cache_key
+        with Image.open(io.BytesIO(source)) as img:
+            # Phone photos store their rotation in EXIF; captions follow the upright image
+            upright = ImageOps.exif_transpose(img)
+            image = upright.convert('RGBA' if 'A' in upright.getbands() else 'RGB')
+        nbytes = image.width * image.height * len(image.getbands())
+        # A photo larger than the whole budget is decoded per call rather than evicting everything
+        if nbytes <= self._bases.max_bytes:
+            self._bases.set(cache_key, (version, image, digest), nbytes)
+        return image, digest
+
+    def resolve(self, image, image_key=None):
+        """(PIL image, content key) for a PIL image, file path or encoded bytes"""
+        if not isinstance(image, Image.Image):
+            return self.load_base(image)
+        return image, image_key or image_digest(image)
+
+    def render(self, image, caption, style, image_key=None):
+        """Captioned copy of ``image`` (a PIL image, file path or encoded bytes)"""
+        image, image_key = self.resolve(image, image_key)
+
+        key = (image_key, caption, style)
+        with self._lock:
+            captioned = self._rendered.get(key)
+            if captioned is not None:
+                self._rendered.move_to_end(key)
+                return captioned
+
+        captioned = draw_caption(image, caption, style)
+        with self._lock:
+            self._remember(self._rendered, key, captioned, self.max_entries)
+        return captioned
+
+    def preview(self, image, max_side=PREVIEW_MAX_SIDE, image_key=None):
+        """(proxy, proxy key, scale factor) with the longest side at most ``max_side``"""
+        if image_key is None and not isinstance(image, (Image.Image, str)):
+            # Encoded bytes are keyed without decoding, so a cached proxy skips the decode
+            image_key = bytes_digest(image)
+        key = (image_key, max_side)
+        with self._lock:
+            entry = self._previews.get(key)
+            if entry is not None:
+                self._previews.move_to_end(key)
+                return entry
+
+        image, image_key = self.resolve(image, image_key)
+        key = (image_key, max_side)
+
+        factor = min(1.0, max_side / max(image.size))
+        if factor < 1:
+            proxy = image.resize(
+                (max(1, round(image.width * factor)), max(1, round(image.height * factor))),
+                Image.BILINEAR, reducing_gap=2.0
+            )
+        else:
+            proxy = image
+        entry = (proxy, f"{image_key}@{max_side}", factor)
+        with self._lock:
+            self._remember(self._previews, key, entry, self.max_bases)
+        return entry
+
+    def render_preview(self, image, caption, style, max_side=PREVIEW_MAX_SIDE, image_key=None):
+        """Caption drawn on the downscaled proxy, laid out as it will be at full size"""
+        proxy, proxy_key, factor = self.preview(image, max_side, image_key)
+        return self.render(proxy, caption, scale_style(style, factor), proxy_key)
+
+    def render_bytes(self, image, caption, style, image_format='PNG', image_key=None):
+        """Encoded captioned image, memoized like ``render`` so downloads never re-encode"""
+        image, image_key = self.resolve(image, image_key)
+        key = (image_key, caption, style, image_format)
+        with self._lock:
+            data = self._encoded.get(key)
+            if data is not None:
+                self._encoded.move_to_end(key)
+                return data
+
+        buffer = io.BytesIO()
+        self.render(image, caption, style, image_key).save(buffer, image_format)
+        data = buffer.getvalue()
+        with self._lock:
+            self._remember(self._encoded, key, data, self.max_entries)
+        return data
+
+
+def creator_caption_style(position, font_size, text_color, bg_opacity):
+    """Visual Content Creator layout: tighter box, black background, no stroke"""
+    return CaptionStyle(
+        position=position, size=font_size, text_color=text_color, bg_opacity=bg_opacity,
+        padding=10, margin=10, bottom_margin=10, stroke_width=0
+    )
+
+
+def add_caption_to_image(image, caption_text, position, font_size, text_color, bg_opacity, max_side=None):
+    """Caption an uploaded image (PIL image, path or bytes).
+
+    With ``max_side`` the caption is drawn on a memoized downscaled proxy for
+    interactive previews. Without it the captioned full-resolution image is
+    not memoized, because large photos would quickly fill the cache; its
+    decoded base is only kept while it fits the renderer's base budget.
+    """
+    renderer = get_caption_renderer()
+    style = creator_caption_style(position, font_size, text_color, bg_opacity)
+    if max_side:
+        return renderer.render_preview(image, caption_text, style, max_side)
+    image, _ = renderer.resolve(image)
+    return draw_caption(image, caption_text, style)
+
+
+_caption_renderer = None
+_caption_renderer_lock = threading.Lock()
+
+
+def get_caption_renderer():
+    """Return the process-wide caption renderer"""
+    global _caption_renderer
+    with _caption_renderer_lock:
+        if _caption_renderer is None:
+            _caption_renderer = CaptionRenderer()
+        return _caption_renderer
+
+
+CaptionSpec = namedtuple('CaptionSpec', ['caption', 'style', 'name'])
+CaptionSpec.__new__.__defaults__ = (None,)
+
+BatchCaption = namedtuple('BatchCaption', ['index', 'spec', 'data', 'error'])
+
+
+def _render_encoded(image, spec, image_format):
+    buffer = io.BytesIO()
+    draw_caption(image, spec.caption, spec.style).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def iter_caption_batch(image, specs, max_workers=None, image_format='PNG'):
+    """Render and encode every spec over one shared base image, yielding as each finishes.
+
+    Workers are threads: they all read the same decoded image, and the work
+    is dominated by Pillow's C drawing and zlib encoding, which release the
+    GIL, so no copy of the base has to cross a process boundary.
+    """
+    image, _ = get_caption_renderer().resolve(image)
+    image.load()
+
+    workers = max_workers or max(1, min(len(specs), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_render_encoded, image, spec, image_format): (index, spec)
+            for index, spec in enumerate(specs)
+        }
+        for future in as_completed(futures):
+            index, spec = futures[future]
+            try:
+                yield BatchCaption(index, spec, future.result(), None)
+            except Exception as e:
+                yield BatchCaption(index, spec, None, str(e))
+
+
+def caption_batch_zip(image, specs, max_workers=None, image_format='PNG', on_result=None):
+    """ZIP archive bytes holding one rendered file per spec, in spec order.
+
+    ``on_result`` is called with each BatchCaption as it completes, for
+    progress reporting. Failed specs are skipped.
+    """
+    results = {}
+    for result in iter_caption_batch(image, specs, max_workers, image_format):
+        if on_result is not None:
+            on_result(result)
+        if result.data is not None:
+            results[result.index] = result
+
+    buffer = io.BytesIO()
+    # Encoded images are already compressed; storing them keeps zipping cheap
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for index in sorted(results):
+            spec = results[index].spec
+            name = spec.name or f"caption_{index + 1:02d}_{spec.style.position.lower()}"
+            archive.writestr(f"{name}.{image_format.lower()}", results[index].data)
+    return buffer.getvalue()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from campaign_analytics import REVENUE_PER_CONVERSION
+
+
+def safe_divide(numerator, denominator, fill=0.0):
+    """Element-wise division that yields ``fill`` instead of inf/NaN for zero denominators"""
+    numerator = np.asarray(numerator, dtype='float64')
+    denominator = np.asarray(denominator, dtype='float64')
+    out = np.full(np.broadcast(numerator, denominator).shape, fill, dtype='float64')
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out if out.ndim else out[()]
+
+
+def min_max_normalize(values):
+    """Scale each column of a 1-D or 2-D array to [0, 1]; constant columns become 0"""
+    values = np.asarray(values, dtype='float64')
+    low = values.min(axis=0)
+    return safe_divide(values - low, values.max(axis=0) - low)
+
+
+def derive_metrics(frame):
+    """CTR, CPC, CVR, ROAS and ROI for each row of an aggregated frame.
+
+    Returns a new frame holding only the derived columns (rates as
+    fractions), computed from the frame's summed metrics without copying it.
+    """
+    impressions = frame['impressions'].to_numpy('float64')
+    clicks = frame['clicks'].to_numpy('float64')
+    conversions = frame['conversions'].to_numpy('float64')
+    cost = frame['cost'].to_numpy('float64')
+    revenue = conversions * REVENUE_PER_CONVERSION
+
+    return pd.DataFrame({
+        'ctr': safe_divide(clicks, impressions),
+        'cpc': safe_divide(cost, clicks),
+        'cvr': safe_divide(conversions, clicks),
+        'roas': safe_divide(revenue, cost),
+        'roi': safe_divide(revenue - cost, cost),
+    }, index=frame.index)
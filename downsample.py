@@ -0,0 +1,84 @@
+import numpy as np
+
+
+DEFAULT_CHART_WIDTH = 1200
+
+
+def max_points_for_width(width_px=DEFAULT_CHART_WIDTH, points_per_pixel=1.0):
+    """More points than horizontal pixels cannot be seen, only paid for"""
+    return max(3, int(width_px * points_per_pixel))
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype('int64')
+    return np.nan_to_num(values.astype('float64'))
+
+
+def lttb_indices(x, y, n_out):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+
+    kept = np.empty(n_out, dtype='int64')
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area; the constant factor does not change argmax
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max of each bucket, preserving spikes exactly"""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = _as_float(y)
+    buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, buckets + 1).astype('int64')
+    lows = np.minimum.reduceat(y, edges[:-1])
+    highs = np.maximum.reduceat(y, edges[:-1])
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+
+    # First position in each bucket where the min / max occurs
+    is_low = y == lows[bucket]
+    is_high = y == highs[bucket]
+    low_idx = np.minimum.reduceat(np.where(is_low, np.arange(n), n), edges[:-1])
+    high_idx = np.minimum.reduceat(np.where(is_high, np.arange(n), n), edges[:-1])
+    return np.unique(np.concatenate([low_idx, high_idx]))
+
+
+def downsample(x, y, max_points, method='lttb'):
+    """Return (x, y) reduced to at most ``max_points`` points"""
+    if len(x) <= max_points:
+        return x, y
+    if method == 'minmax':
+        kept = minmax_indices(y, max_points)
+    else:
+        kept = lttb_indices(x, y, max_points)
+    x = x.iloc[kept] if hasattr(x, 'iloc') else np.asarray(x)[kept]
+    y = y.iloc[kept] if hasattr(y, 'iloc') else np.asarray(y)[kept]
+    return x, y
@@ -1,149 +1,252 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import json
-import random
 
-def generate_campaign_data(num_days=90):
-    """Generate realistic campaign data with more variance in distribution"""
-    
-    np.random.seed(42)
+# Platforms with dynamic weights that change over time
+PLATFORMS = {
+    'Instagram': {'base_weight': 0.3, 'trend': 0.001},  # Growing platform
+    'Facebook': {'base_weight': 0.25, 'trend': -0.0005},  # Slightly declining
+    'LinkedIn': {'base_weight': 0.2, 'trend': 0.0008},   # Growing for B2B
+    'Twitter': {'base_weight': 0.15, 'trend': -0.001},   # Declining
+    'TikTok': {'base_weight': 0.1, 'trend': 0.002}      # Rapidly growing
+}
+
+# Campaign types with platform-specific effectiveness
+CAMPAIGN_TYPES = {
+    'Brand Awareness': {
+        'Instagram': {'weight': 0.4, 'impression_mult': 2.5, 'engagement_rate': 0.04},
+        'Facebook': {'weight': 0.3, 'impression_mult': 2.0, 'engagement_rate': 0.03},
+        'LinkedIn': {'weight': 0.2, 'impression_mult': 1.5, 'engagement_rate': 0.02},
+        'Twitter': {'weight': 0.3, 'impression_mult': 1.8, 'engagement_rate': 0.025},
+        'TikTok': {'weight': 0.5, 'impression_mult': 3.0, 'engagement_rate': 0.05}
+    },
+    'Lead Generation': {
+        'Instagram': {'weight': 0.2, 'impression_mult': 1.0, 'engagement_rate': 0.03},
+        'Facebook': {'weight': 0.3, 'impression_mult': 1.2, 'engagement_rate': 0.04},
+        'LinkedIn': {'weight': 0.4, 'impression_mult': 1.5, 'engagement_rate': 0.05},
+        'Twitter': {'weight': 0.2, 'impression_mult': 0.8, 'engagement_rate': 0.02},
+        'TikTok': {'weight': 0.1, 'impression_mult': 0.7, 'engagement_rate': 0.02}
+    },
+    'Sales': {
+        'Instagram': {'weight': 0.3, 'impression_mult': 1.8, 'engagement_rate': 0.035},
+        'Facebook': {'weight': 0.35, 'impression_mult': 2.0, 'engagement_rate': 0.04},
+        'LinkedIn': {'weight': 0.3, 'impression_mult': 1.6, 'engagement_rate': 0.03},
+        'Twitter': {'weight': 0.2, 'impression_mult': 1.2, 'engagement_rate': 0.025},
+        'TikTok': {'weight': 0.3, 'impression_mult': 1.5, 'engagement_rate': 0.045}
+    },
+    'Content Promotion': {
+        'Instagram': {'weight': 0.35, 'impression_mult': 1.5, 'engagement_rate': 0.06},
+        'Facebook': {'weight': 0.25, 'impression_mult': 1.3, 'engagement_rate': 0.05},
+        'LinkedIn': {'weight': 0.3, 'impression_mult': 1.4, 'engagement_rate': 0.04},
+        'Twitter': {'weight': 0.4, 'impression_mult': 1.6, 'engagement_rate': 0.055},
+        'TikTok': {'weight': 0.4, 'impression_mult': 1.8, 'engagement_rate': 0.07}
+    }
+}
+
+PLATFORM_NAMES = np.array(list(PLATFORMS), dtype=object)
+CAMPAIGN_TYPE_NAMES = np.array(list(CAMPAIGN_TYPES), dtype=object)
+
+# (platform, campaign type) lookup tables for the vectorized draws
+TYPE_WEIGHTS = np.array([[CAMPAIGN_TYPES[t][p]['weight'] for t in CAMPAIGN_TYPES] for p in PLATFORMS])
+TYPE_CUMULATIVE = np.cumsum(TYPE_WEIGHTS / TYPE_WEIGHTS.sum(axis=1, keepdims=True), axis=1)
+IMPRESSION_MULT = np.array([[CAMPAIGN_TYPES[t][p]['impression_mult'] for t in CAMPAIGN_TYPES] for p in PLATFORMS])
+
+
+def _generate_block(rng, dates, day_offset=0, campaign_scale=1.0):
+    """Draw every campaign row for ``dates`` in a handful of NumPy calls.
+
+    ``day_offset`` is the index of ``dates[0]`` within the whole series, so
+    platform trends continue seamlessly when a long range is generated in
+    consecutive blocks.
+    """
+    day_index = np.arange(len(dates)) + day_offset
+
+    # Evolving platform weights, one row per day
+    base = np.array([info['base_weight'] for info in PLATFORMS.values()])
+    trend = np.array([info['trend'] for info in PLATFORMS.values()])
+    weights = np.clip(base + np.outer(day_index, trend), 0.05, 0.5)
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    # Add seasonal effects
+    season_multiplier = 1.0 + 0.3 * np.sin(2 * np.pi * dates.dayofweek.to_numpy() / 7)  # Weekly pattern
+    holiday_multiplier = 1.0 + 0.5 * np.sin(2 * np.pi * dates.day.to_numpy() / 365)     # Yearly pattern
+
+    # Dynamic number of campaigns based on platform popularity; rows stay
+    # ordered by date, then platform
+    campaigns = rng.poisson(np.maximum(1, 5 * weights) * campaign_scale)
+    day = np.repeat(np.arange(len(dates)), campaigns.sum(axis=1))
+    platform = np.repeat(np.tile(np.arange(len(PLATFORMS)), len(dates)), campaigns.ravel())
+    n = len(day)
+
+    # Weight campaign types by platform: shifting platform p's cumulative
+    # probabilities into [p, p + 1) lets one searchsorted serve every platform
+    n_types = len(CAMPAIGN_TYPES)
+    shifted = (TYPE_CUMULATIVE + np.arange(len(PLATFORMS))[:, None]).ravel()
+    campaign_type = np.searchsorted(shifted, platform + rng.random(n), side='right') - platform * n_types
+    campaign_type = np.minimum(campaign_type, n_types - 1)
+    impression_mult = IMPRESSION_MULT[platform, campaign_type]
+
+    # Generate base metrics with more variance
+    base_impressions = rng.gamma(10000 * impression_mult, 0.5) * (season_multiplier * holiday_multiplier)[day]
+
+    # Add random spikes and dips (10% chance of exceptional performance)
+    spikes = rng.random(n) < 0.1
+    base_impressions[spikes] *= rng.choice([0.2, 0.5, 2.0, 5.0], spikes.sum())
+
+    impressions = np.maximum(100, base_impressions.astype('int64'))
+
+    # Much higher conversion rates for better funnel visibility
+    engagement = (impressions * rng.uniform(0.15, 0.25, n)).astype('int64')  # 15-25% engagement
+    clicks = (engagement * rng.uniform(0.25, 0.35, n)).astype('int64')  # 25-35% of engaged users click
+    conversions = (clicks * rng.uniform(0.15, 0.25, n)).astype('int64')  # 15-25% of clicks convert
+
+    # Ensure minimum values and logical progression
+    engagement = np.maximum((impressions * 0.15).astype('int64'), np.minimum(engagement, impressions))
+    clicks = np.maximum((engagement * 0.25).astype('int64'), np.minimum(clicks, engagement))
+    conversions = np.maximum((clicks * 0.15).astype('int64'), np.minimum(conversions, clicks))
+
+    # Variable cost per platform and campaign type
+    base_cpm = rng.normal(5 * impression_mult, impression_mult)
+    cost = np.round(impressions * base_cpm / 1000, 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ctr = np.where(impressions > 0, np.round(clicks / impressions * 100, 3), 0)
+        conversion_rate = np.where(clicks > 0, np.round(conversions / clicks * 100, 3), 0)
+        cpc = np.where(clicks > 0, np.round(cost / clicks, 2), 0)
+        roas = np.where(cost > 0, np.round((conversions * 50) / cost, 2), 0)
+
+    return pd.DataFrame({
+        'date': np.asarray(dates.strftime('%Y-%m-%d'), dtype=object)[day],
+        'platform': PLATFORM_NAMES[platform],
+        'campaign_type': CAMPAIGN_TYPE_NAMES[campaign_type],
+        'impressions': impressions,
+        'engagement': engagement,
+        'clicks': clicks,
+        'conversions': conversions,
+        'cost': cost,
+        'ctr': ctr,
+        'conversion_rate': conversion_rate,
+        'cpc': cpc,
+        'roas': roas
+    })
+
+
+def generate_campaign_data(num_days=90, seed=42, campaign_scale=1.0):
+    """Generate realistic campaign data with more variance in distribution.
+
+    ``campaign_scale`` multiplies the expected number of campaigns per
+    platform and day, so load-test datasets can grow in rows as well as
+    in days. The same seed always draws the same rows.
+    """
+    rng = np.random.default_rng(seed)
     
     # Generate dates
     end_date = datetime.now()
     start_date = end_date - timedelta(days=num_days)
     dates = pd.date_range(start=start_date, end=end_date, freq='D')
     
-    # Platforms with dynamic weights that change over time
-    platforms = {
-        'Instagram': {'base_weight': 0.3, 'trend': 0.001},  # Growing platform
-        'Facebook': {'base_weight': 0.25, 'trend': -0.0005},  # Slightly declining
-        'LinkedIn': {'base_weight': 0.2, 'trend': 0.0008},   # Growing for B2B
-        'Twitter': {'base_weight': 0.15, 'trend': -0.001},   # Declining
-        'TikTok': {'base_weight': 0.1, 'trend': 0.002}      # Rapidly growing
-    }
+    return _generate_block(rng, dates, campaign_scale=campaign_scale)
+
+
+def iter_campaign_data(num_days=90, seed=42, campaign_scale=1.0, chunk_rows=250_000):
+    """Yield campaign data as frames of roughly ``chunk_rows`` rows, a block of days at a time.
+
+    Only one block is ever in memory. Blocks continue the platform trends of
+    the full range, and a given (seed, chunk_rows) always yields the same
+    rows, though not the same rows as one generate_campaign_data call.
+    """
+    rng = np.random.default_rng(seed)
     
-    # Campaign types with platform-specific effectiveness
-    campaign_types = {
-        'Brand Awareness': {
-            'Instagram': {'weight': 0.4, 'impression_mult': 2.5, 'engagement_rate': 0.04},
-            'Facebook': {'weight': 0.3, 'impression_mult': 2.0, 'engagement_rate': 0.03},
-            'LinkedIn': {'weight': 0.2, 'impression_mult': 1.5, 'engagement_rate': 0.02},
-            'Twitter': {'weight': 0.3, 'impression_mult': 1.8, 'engagement_rate': 0.025},
-            'TikTok': {'weight': 0.5, 'impression_mult': 3.0, 'engagement_rate': 0.05}
-        },
-        'Lead Generation': {
-            'Instagram': {'weight': 0.2, 'impression_mult': 1.0, 'engagement_rate': 0.03},
-            'Facebook': {'weight': 0.3, 'impression_mult': 1.2, 'engagement_rate': 0.04},
-            'LinkedIn': {'weight': 0.4, 'impression_mult': 1.5, 'engagement_rate': 0.05},
-            'Twitter': {'weight': 0.2, 'impression_mult': 0.8, 'engagement_rate': 0.02},
-            'TikTok': {'weight': 0.1, 'impression_mult': 0.7, 'engagement_rate': 0.02}
-        },
-        'Sales': {
-            'Instagram': {'weight': 0.3, 'impression_mult': 1.8, 'engagement_rate': 0.035},
-            'Facebook': {'weight': 0.35, 'impression_mult': 2.0, 'engagement_rate': 0.04},
-            'LinkedIn': {'weight': 0.3, 'impression_mult': 1.6, 'engagement_rate': 0.03},
-            'Twitter': {'weight': 0.2, 'impression_mult': 1.2, 'engagement_rate': 0.025},
-            'TikTok': {'weight': 0.3, 'impression_mult': 1.5, 'engagement_rate': 0.045}
-        },
-        'Content Promotion': {
-            'Instagram': {'weight': 0.35, 'impression_mult': 1.5, 'engagement_rate': 0.06},
-            'Facebook': {'weight': 0.25, 'impression_mult': 1.3, 'engagement_rate': 0.05},
-            'LinkedIn': {'weight': 0.3, 'impression_mult': 1.4, 'engagement_rate': 0.04},
-            'Twitter': {'weight': 0.4, 'impression_mult': 1.6, 'engagement_rate': 0.055},
-            'TikTok': {'weight': 0.4, 'impression_mult': 1.8, 'engagement_rate': 0.07}
-        }
-    }
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=num_days)
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
     
-    data = []
-    for i, date in enumerate(dates):
-        # Calculate evolving platform weights
-        day_progress = i / len(dates)
-        current_platform_weights = {
-            platform: max(0.05, min(0.5, info['base_weight'] + (info['trend'] * i)))
-            for platform, info in platforms.items()
-        }
-        
-        # Normalize weights
-        weight_sum = sum(current_platform_weights.values())
-        current_platform_weights = {
-            k: v/weight_sum for k, v in current_platform_weights.items()
-        }
-        
-        # Add seasonal effects
-        season_multiplier = 1.0 + 0.3 * np.sin(2 * np.pi * date.dayofweek / 7)  # Weekly pattern
-        holiday_multiplier = 1.0 + 0.5 * np.sin(2 * np.pi * date.day / 365)     # Yearly pattern
-        
-        for platform in platforms.keys():
-            # Dynamic number of campaigns based on platform popularity
-            base_campaigns = np.random.poisson(
-                max(1, 5 * current_platform_weights[platform])
-            )
-            
-            for _ in range(base_campaigns):
-                # Weight campaign types by platform
-                campaign_weights = [
-                    types[platform]['weight'] 
-                    for types in campaign_types.values()
-                ]
-                campaign_type = np.random.choice(
-                    list(campaign_types.keys()),
-                    p=np.array(campaign_weights) / sum(campaign_weights)
-                )
-                
-                # Get platform-specific metrics
-                metrics = campaign_types[campaign_type][platform]
-                
-                # Generate base metrics with more variance
-                base_impressions = np.random.gamma(
-                    10000 * metrics['impression_mult'],
-                    0.5
-                ) * season_multiplier * holiday_multiplier
-                
-                # Add random spikes and dips
-                if np.random.random() < 0.1:  # 10% chance of exceptional performance
-                    base_impressions *= np.random.choice([0.2, 0.5, 2.0, 5.0])
-                
-                impressions = max(100, int(base_impressions))
-                
-                # Much higher conversion rates for better funnel visibility
-                engagement_rate = np.random.uniform(0.15, 0.25)  # 15-25% engagement
-                engagement = int(impressions * engagement_rate)
-                
-                click_rate = np.random.uniform(0.25, 0.35)  # 25-35% of engaged users click
-                clicks = int(engagement * click_rate)
-                
-                conversion_rate = np.random.uniform(0.15, 0.25)  # 15-25% of clicks convert
-                conversions = int(clicks * conversion_rate)
-                
-                # Ensure minimum values and logical progression
-                engagement = max(int(impressions * 0.15), min(engagement, impressions))
-                clicks = max(int(engagement * 0.25), min(clicks, engagement))
-                conversions = max(int(clicks * 0.15), min(conversions, clicks))
-                
-                # Variable cost per platform and campaign type
-                base_cpm = np.random.normal(
-                    5 * metrics['impression_mult'],
-                    metrics['impression_mult']
-                )
-                cost = round(impressions * base_cpm / 1000, 2)
-                
-                data.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'platform': platform,
-                    'campaign_type': campaign_type,
-                    'impressions': impressions,
-                    'engagement': engagement,
-                    'clicks': clicks,
-                    'conversions': conversions,
-                    'cost': cost,
-                    'ctr': round(clicks/impressions*100, 3) if impressions > 0 else 0,
-                    'conversion_rate': round(conversions/clicks*100, 3) if clicks > 0 else 0,
-                    'cpc': round(cost/clicks, 2) if clicks > 0 else 0,
-                    'roas': round((conversions * 50)/cost, 2) if cost > 0 else 0
-                })
-    
-    return pd.DataFrame(data)
+    # Each platform expects at most 2.5 campaigns a day before scaling
+    chunk_days = max(1, int(chunk_rows / (2.5 * len(PLATFORMS) * campaign_scale)))
+    for offset in range(0, len(dates), chunk_days):
+        yield _generate_block(rng, dates[offset:offset + chunk_days], offset, campaign_scale)
+
+
+class SummaryAccumulator:
+    """Platform and daily summary sheets built up one chunk at a time"""
+
+    SUM_COLUMNS = ['impressions', 'engagement', 'clicks', 'conversions', 'cost']
+    MEAN_COLUMNS = ['ctr', 'conversion_rate', 'roas']
+
+    def __init__(self):
+        self._platform = None
+        self._daily = None
+
+    @staticmethod
+    def _add(total, part):
+        return part if total is None else total.add(part, fill_value=0)
+
+    def update(self, chunk):
+        # Means are carried as sums plus a row count until the end
+        platform = chunk.groupby('platform')[self.SUM_COLUMNS + self.MEAN_COLUMNS].sum()
+        platform['rows'] = chunk.groupby('platform').size()
+        self._platform = self._add(self._platform, platform)
+        self._daily = self._add(self._daily, chunk.groupby('date')[self.SUM_COLUMNS].sum())
+
+    def platform_summary(self):
+        summary = self._platform[self.SUM_COLUMNS].copy()
+        for col in self.MEAN_COLUMNS:
+            summary[col] = self._platform[col] / self._platform['rows']
+        return summary.round(2)
+
+    def daily_summary(self):
+        return self._daily.sort_index().round(2)
+
+
+def stream_sample_data(chunks, output_dir='sample_data'):
+    """Write chunks to CSV, JSON-lines and Parquet together, plus summary-only Excel.
+
+    Raw rows never leave the current chunk, so fixture size is bounded by
+    disk rather than memory. The workbook holds only the summary sheets:
+    a raw-data sheet would exceed Excel's 1,048,576-row limit anyway.
+    Returns the number of rows written.
+    """
+    import os
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        print("pyarrow not installed. Skipping Parquet output.")
+        pyarrow = None
+    
+    summaries = SummaryAccumulator()
+    parquet_writer = None
+    rows = 0
+    with open(f'{output_dir}/campaign_data.csv', 'w', newline='') as csv_file, \
+            open(f'{output_dir}/campaign_data.jsonl', 'w') as jsonl_file:
+        try:
+            for chunk in chunks:
+                chunk.to_csv(csv_file, index=False, header=rows == 0)
+                chunk.to_json(jsonl_file, orient='records', lines=True, date_format='iso')
+                if pyarrow is not None:
+                    table = pyarrow.Table.from_pandas(
+                        chunk.assign(date=pd.to_datetime(chunk['date'])), preserve_index=False
+                    )
+                    if parquet_writer is None:
+                        parquet_writer = pyarrow.parquet.ParquetWriter(
+                            f'{output_dir}/campaign_data.parquet', table.schema
+                        )
+                    parquet_writer.write_table(table)
+                summaries.update(chunk)
+                rows += len(chunk)
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
+    
+    if rows:
+        with pd.ExcelWriter(f'{output_dir}/campaign_data.xlsx') as writer:
+            summaries.platform_summary().to_excel(writer, sheet_name='Platform Summary')
+            summaries.daily_summary().to_excel(writer, sheet_name='Daily Summary')
+    return rows
+
 
 def save_sample_data(df, output_dir='sample_data'):
     """Save the sample data in multiple formats"""
@@ -184,19 +287,52 @@ def save_sample_data(df, output_dir='sample_data'):
     
     # Save as JSON
     df.to_json(f'{output_dir}/campaign_data.json', orient='records', date_format='iso')
+    
+    # Save columnar copies for large-file loading
+    try:
+        save_columnar_data(df, output_dir)
+    except ImportError:
+        print("pyarrow not installed. Skipping Parquet and Feather output.")
+
+def save_columnar_data(df, output_dir='sample_data'):
+    """Write Parquet and Arrow IPC (Feather) copies with typed columns"""
+    columnar = df.assign(date=pd.to_datetime(df['date']))
+    for col in ['platform', 'campaign_type']:
+        columnar[col] = columnar[col].astype('category')
+    
+    columnar.to_parquet(f'{output_dir}/campaign_data.parquet', index=False)
+    columnar.to_feather(f'{output_dir}/campaign_data.feather')
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate sample campaign data")
+    parser.add_argument('--days', type=int, default=90, help="Number of days of data")
+    parser.add_argument('--scale', type=float, default=1.0, help="Campaign count multiplier")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write in chunks with bounded memory (CSV, JSON-lines, Parquet, summary Excel)")
+    parser.add_argument('--output-dir', default='sample_data')
+    args = parser.parse_args()
+    
+    if args.stream:
+        print("Streaming sample campaign data...")
+        rows = stream_sample_data(
+            iter_campaign_data(args.days, campaign_scale=args.scale), args.output_dir
+        )
+        print(f"Generated {rows} records of campaign data")
+        raise SystemExit
+    
     # Generate sample data
     print("Generating sample campaign data...")
-    df = generate_campaign_data(90)  # 90 days of data
+    df = generate_campaign_data(args.days, campaign_scale=args.scale)
     
     # Save in multiple formats
     print("Saving data in multiple formats...")
-    save_sample_data(df)
+    save_sample_data(df, args.output_dir)
     
     print(f"Generated {len(df)} records of campaign data")
     print("\nSample data statistics:")
     print("\nTotal by platform:")
     print(df.groupby('platform')['impressions'].sum().sort_values(ascending=False))
     print("\nAverage metrics:")
-    print(df[['impressions', 'engagement', 'clicks', 'conversions', 'cost']].mean().round(2)) 
\ No newline at end of file
+    print(df[['impressions', 'engagement', 'clicks', 'conversions', 'cost']].mean().round(2))
@@ -0,0 +1,111 @@
+import io
+import threading
+from collections import OrderedDict, namedtuple
+
+from PIL import Image, ImageOps
+
+from caption_renderer import get_caption_renderer, scale_style
+from sized_cache import SizedLRUCache
+
+
+ExportPreset = namedtuple('ExportPreset', ['name', 'width', 'height'])
+
+PRESETS = OrderedDict((preset.name, preset) for preset in [
+    ExportPreset("Instagram Square", 1080, 1080),
+    ExportPreset("Instagram Portrait", 1080, 1350),
+    ExportPreset("LinkedIn", 1200, 627),
+    ExportPreset("Twitter", 1600, 900),
+    ExportPreset("Facebook", 1200, 630),
+])
+
+# Preset offered first for each platform in the post generator
+PLATFORM_PRESETS = {
+    "Instagram": "Instagram Square",
+    "LinkedIn": "LinkedIn",
+    "Twitter": "Twitter",
+    "Facebook": "Facebook",
+}
+
+FORMATS = OrderedDict([
+    ("WebP", ('WEBP', 'webp', 'image/webp')),
+    ("JPEG", ('JPEG', 'jpg', 'image/jpeg')),
+    ("PNG", ('PNG', 'png', 'image/png')),
+])
+
+ExportResult = namedtuple('ExportResult', ['data', 'extension', 'mime', 'size'])
+
+
+def fit_to_preset(image, preset):
+    """Scale and centre-crop ``image`` to exactly the preset's dimensions"""
+    if image.size == (preset.width, preset.height):
+        return image
+    return ImageOps.fit(image, (preset.width, preset.height), Image.LANCZOS)
+
+
+def fit_scale(image, preset):
+    """Factor fit_to_preset scales ``image`` by before cropping"""
+    return max(preset.width / image.width, preset.height / image.height)
+
+
+def encode_image(image, format_name, quality=85):
+    """Encode with settings tuned per format; ``quality`` applies to WebP and JPEG"""
+    pil_format, _, _ = FORMATS[format_name]
+    buffer = io.BytesIO()
+    if pil_format == 'JPEG':
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    elif pil_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=quality, method=4)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+class ExportCache:
+    """LRU of encoded variants keyed by (source digest, preset, format, quality),
+    bounded by the total encoded size"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self._variants = SizedLRUCache(max_bytes)
+
+    def export(self, image, preset_name, format_name, quality=85, image_key=None, caption=None, style=None):
+        """Encoded ``image`` (PIL image, file path or bytes) for one preset and format.
+
+        A caption is drawn after the image is fitted, with ``style`` scaled
+        by the fit, so cropping to the preset never cuts it off.
+        """
+        renderer = get_caption_renderer()
+        image, image_key = renderer.resolve(image, image_key)
+
+        if format_name == "PNG":
+            quality = None  # lossless: quality does not change the bytes
+        key = (image_key, preset_name, format_name, quality, caption, style if caption else None)
+        result = self._variants.get(key)
+        if result is not None:
+            return result
+
+        preset = PRESETS[preset_name]
+        _, extension, mime = FORMATS[format_name]
+        fitted = fit_to_preset(image, preset)
+        if caption:
+            fitted = renderer.render(
+                fitted, caption, scale_style(style, fit_scale(image, preset)), f"{image_key}/{preset_name}"
+            )
+        data = encode_image(fitted, format_name, quality or 85)
+        result = ExportResult(data, extension, mime, (preset.width, preset.height))
+        self._variants.set(key, result, nbytes=len(data))
+        return result
+
+
+_export_cache = None
+_export_cache_lock = threading.Lock()
+
+
+def get_export_cache():
+    """Return the process-wide export cache"""
+    global _export_cache
+    with _export_cache_lock:
+        if _export_cache is None:
+            _export_cache = ExportCache()
+        return _export_cache
@@ -7,10 +7,39 @@ import requests
 import os
 import base64
 from datetime import datetime
-import time
+from image_store import get_image_store
+
+# Point at sample_data/chroma_stub.html (file://...) to run without the live site
+CHROMA_URL = os.getenv('CHROMA_URL', 'https://chroma-neon.vercel.app/')
+
+# Base64 decodes 4 characters at a time, so slices must be a multiple of 4
+DATA_URL_CHUNK_CHARS = 4 * 64 * 1024
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# Reused across downloads so connections to the image host are kept alive
+http_session = requests.Session()
+
+# Returns the src of the first fully decoded <img> that was not on the page
+# before the prompt was submitted, or null while generation is still running
+NEW_IMAGE_SCRIPT = """
+const previous = new Set(arguments[0]);
+for (const img of document.images) {
+    const src = img.currentSrc || img.src;
+    if (src && !previous.has(src) && img.complete && img.naturalWidth > 0) {
+        return src;
+    }
+}
+return null;
+"""
+
+IMAGE_SOURCES_SCRIPT = "return Array.from(document.images, img => img.currentSrc || img.src);"
 
 class ChromaImageScraper:
-    def __init__(self):
+    def __init__(self, base_url=CHROMA_URL, timeout=40, poll_interval=0.2, store=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        
         # Setup Chrome options
         self.options = webdriver.ChromeOptions()
         self.options.add_argument('--headless')
@@ -20,72 +49,57 @@ class ChromaImageScraper:
         self.options.add_argument('--window-size=1920,1080')
         self.driver = webdriver.Chrome(options=self.options)
         
-        # Create downloads directory if it doesn't exist
-        self.download_dir = 'downloaded_images'
-        if not os.path.exists(self.download_dir):
-            os.makedirs(self.download_dir)
+        # Generated images are stored by content hash and indexed by prompt
+        self.store = store or get_image_store()
+        self.download_dir = self.store.root
 
-    def get_generated_image(self, prompt):
+    def get_generated_image(self, prompt, use_store=True):
+        if use_store:
+            cached_path = self.store.lookup(prompt)
+            if cached_path:
+                print(f"Reusing stored image: {cached_path}")
+                return cached_path
+        
         try:
             print("Navigating to website...")
-            self.driver.get('https://chroma-neon.vercel.app/')
+            self.driver.get(self.base_url)
             
             print("Entering prompt...")
-            prompt_input = WebDriverWait(self.driver, 10).until(
+            prompt_input = WebDriverWait(self.driver, 10, poll_frequency=self.poll_interval).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, 'textarea.flex'))
             )
+            
+            # Newlines would submit the textarea early, so send a single line
+            prompt = ' '.join(prompt.split())
             prompt_input.clear()
             prompt_input.send_keys(prompt)
-            time.sleep(1)
+            
+            # Remember what is already on the page so a stale image is never picked up
+            previous_sources = self.driver.execute_script(IMAGE_SOURCES_SCRIPT)
             
             print("Pressing Enter to generate image...")
             prompt_input.send_keys(Keys.RETURN)
             
-            print("Waiting for image generation (this may take up to 30 seconds)...")
-            time.sleep(5)
+            print(f"Waiting for image generation (up to {self.timeout} seconds)...")
             
             try:
-                image_element = WebDriverWait(self.driver, 30).until(
-                    EC.presence_of_element_located((By.TAG_NAME, 'img'))
+                image_src = WebDriverWait(self.driver, self.timeout, poll_frequency=self.poll_interval).until(
+                    lambda driver: driver.execute_script(NEW_IMAGE_SCRIPT, previous_sources)
                 )
-                
-                # Wait a bit to ensure image is fully loaded
-                time.sleep(2)
-                
-                # Get the image source
-                image_src = image_element.get_attribute('src')
                 print("Found image data")
                 
                 if image_src:
                     # Handle base64 image
                     if image_src.startswith('data:image'):
-                        # Extract the base64 data
-                        import base64
-                        # Remove the data URL prefix (e.g., 'data:image/png;base64,')
-                        base64_data = image_src.split(',')[1]
-                        
-                        # Decode base64 to binary
-                        image_data = base64.b64decode(base64_data)
-                        
-                        # Save the image
-                        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        filename = f"{self.download_dir}/chroma_{timestamp}.png"
-                        
-                        with open(filename, 'wb') as f:
-                            f.write(image_data)
+                        filename = self._save_data_url(image_src, prompt)
                         print(f"Image successfully saved: {filename}")
                         return filename
                         
                     # Handle regular URL
                     elif image_src.startswith('http'):
-                        response = requests.get(image_src)
-                        if response.status_code == 200:
-                            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                            filename = f"{self.download_dir}/chroma_{timestamp}.png"
-                            with open(filename, 'wb') as f:
-                                f.write(response.content)
-                            print(f"Image successfully downloaded: {filename}")
-                            return filename
+                        filename = self._download(image_src, prompt)
+                        print(f"Image successfully downloaded: {filename}")
+                        return filename
                     
                     print("Invalid image source format")
                     return None
@@ -103,6 +117,33 @@ class ChromaImageScraper:
                 print("Could not save error screenshot")
             return None
         
+    def _save_data_url(self, image_src, prompt):
+        # Decode in slices straight into the store instead of splitting the
+        # whole data URL and materialising every decoded byte at once
+        header_end = image_src.index(',')
+        if ';base64' not in image_src[:header_end]:
+            raise ValueError("Only base64 data URLs are supported")
+        
+        with self.store.open_writer(prompt) as writer:
+            for start in range(header_end + 1, len(image_src), DATA_URL_CHUNK_CHARS):
+                writer.write(base64.b64decode(image_src[start:start + DATA_URL_CHUNK_CHARS]))
+            return writer.commit()
+    
+    def _download(self, url, prompt):
+        with http_session.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            with self.store.open_writer(prompt) as writer:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    writer.write(chunk)
+                return writer.commit()
+        
+    def is_healthy(self):
+        # A crashed or disconnected browser fails even a trivial script
+        try:
+            return self.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+        
     def close(self):
         self.driver.quit()
 
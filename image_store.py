@@ -0,0 +1,239 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import normalize_prompt
+
+
+DEFAULT_STORE_DIR = os.getenv('IMAGE_STORE_DIR', 'downloaded_images')
+DEFAULT_MAX_BYTES = int(os.getenv('IMAGE_STORE_MAX_BYTES', 500 * 1024 * 1024))
+
+
+def sniff_image_type(header):
+    """Return the file extension for known image magic bytes, else None"""
+    header = bytes(header[:12])
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImageWriter:
+    """Streams image bytes into the store without holding them in memory.
+
+    Chunks are hashed and written to a temp file as they arrive; ``commit``
+    checks the image header and moves the file to its content address.
+    """
+
+    HEADER_SIZE = 12
+
+    def __init__(self, store, prompt=None):
+        self.store = store
+        self.prompt = prompt
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._header = bytearray()
+        fd, self._tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.join(store.root, 'objects'))
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk):
+        if len(self._header) < self.HEADER_SIZE:
+            self._header += chunk[:self.HEADER_SIZE - len(self._header)]
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        self._file.close()
+        ext = sniff_image_type(self._header)
+        if ext is None:
+            self.abort()
+            raise ValueError("Downloaded data is not a recognised image format")
+
+        digest = self._hash.hexdigest()
+        path = self.store.path_for(digest, ext)
+        if os.path.exists(path):
+            os.remove(self._tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp_path, path)
+        self.store._index(digest, path, self.size, self.prompt)
+        return path
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+
+class ImageStore:
+    """Content-addressed image store with a prompt -> image index.
+
+    Images live at ``<root>/objects/<aa>/<sha256>.<ext>`` so identical bytes
+    are stored once, and the least recently used images are evicted once the
+    store grows past ``max_bytes``.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writer = None
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(root, 'index.sqlite3'), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                digest TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS prompts (
+                prompt TEXT PRIMARY KEY,
+                digest TEXT NOT NULL REFERENCES images(digest),
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS images_last_access ON images(last_access);
+            CREATE INDEX IF NOT EXISTS prompts_digest ON prompts(digest);
+            """
+        )
+        self._conn.commit()
+
+    def path_for(self, digest, ext='png'):
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.{ext}")
+
+    def open_writer(self, prompt=None):
+        """Start a streamed write; call ``commit()`` on the writer for the path"""
+        return ImageWriter(self, prompt)
+
+    def put(self, data, prompt=None, ext='png'):
+        """Store image bytes (deduplicated by hash) and return their path"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, sniff_image_type(data) or ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp name first so readers never see a partial file
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._index(digest, path, len(data), prompt)
+        return path
+
+    def put_async(self, data, prompt=None, ext='png'):
+        """Queue ``put`` on a background writer; returns a Future of the path.
+
+        Writes are serialised on one thread so callers never wait on disk.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-store')
+        return self._writer.submit(self.put, bytes(data), prompt, ext)
+
+    def _index(self, digest, path, size, prompt):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO images (digest, path, size, created_at, last_access)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(digest) DO UPDATE SET last_access = excluded.last_access""",
+                (digest, path, size, now, now)
+            )
+            if prompt:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO prompts (prompt, digest, created_at) VALUES (?, ?, ?)",
+                    (normalize_prompt(prompt), digest, now)
+                )
+            self._evict(keep=digest)
+            self._conn.commit()
+
+    def lookup(self, prompt):
+        """Return the stored image path for a previously generated prompt"""
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT images.digest, images.path FROM prompts
+                   JOIN images ON images.digest = prompts.digest
+                   WHERE prompts.prompt = ?""",
+                (normalize_prompt(prompt),)
+            ).fetchone()
+            if row is None:
+                return None
+
+            digest, path = row
+            if not os.path.exists(path):
+                # File removed behind our back; forget it
+                self._forget(digest)
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE images SET last_access = ? WHERE digest = ?", (time.time(), digest)
+            )
+            self._conn.commit()
+            return path
+
+    def _forget(self, digest):
+        self._conn.execute("DELETE FROM prompts WHERE digest = ?", (digest,))
+        self._conn.execute("DELETE FROM images WHERE digest = ?", (digest,))
+
+    def _evict(self, keep=None):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+        if not self.max_bytes or total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT digest, path, size FROM images ORDER BY last_access ASC"
+        ).fetchall()
+        for digest, path, size in rows:
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._forget(digest)
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            images, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images"
+            ).fetchone()
+            prompts = self._conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+        return {'images': images, 'bytes': size, 'prompts': prompts}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_image_store():
+    """Process-wide store shared by every scraper and Streamlit session"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class TokenBucketRateLimiter:
+    """Thread-safe token bucket limiter with O(1) work per request.
+
+    The bucket holds at most ``burst`` tokens and refills at
+    ``(requests_per_minute - burst) / 60`` tokens per second, so burst plus
+    refill never exceed ``requests_per_minute`` in any 60 second window.
+
+    When ``db_path`` is given the bucket state lives in SQLite and is shared
+    by every process pointing at the same file.
+    """
+
+    def __init__(self, requests_per_minute=60, burst=None, db_path=None, name='gemini'):
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst if burst is not None else max(1, requests_per_minute // 10)
+        self.rate = max(requests_per_minute - self.burst, 1) / 60.0
+        self.name = name
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS buckets (
+                        name TEXT PRIMARY KEY,
+                        tokens REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    )"""
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (name, float(self.burst), time.time())
+                )
+            finally:
+                conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _reserve(self, tokens, updated, now, timeout):
+        # Refill, then take a token; a negative balance is a reservation
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+        if timeout is not None and wait > timeout:
+            return tokens, None
+        return tokens - 1, wait
+
+    def _reserve_local(self, timeout):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = self._reserve(self._tokens, self._updated, now, timeout)
+            self._updated = now
+            return wait
+
+    def _reserve_shared(self, timeout):
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock, serialising all processes
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens, wait = self._reserve(tokens, updated, now, timeout)
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                (tokens, now, self.name)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, timeout=None):
+        """Take one request slot, sleeping outside the lock until it is due.
+
+        Returns False without consuming a slot if the wait would exceed
+        ``timeout`` seconds.
+        """
+        if self.db_path:
+            wait = self._reserve_shared(timeout)
+        else:
+            wait = self._reserve_local(timeout)
+
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def wait_if_needed(self):
+        self.acquire()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(requests_per_minute=60, db_path=None):
+    """Process-wide limiter so every Streamlit session draws from one bucket"""
+    key = (requests_per_minute, db_path)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = TokenBucketRateLimiter(requests_per_minute, db_path=db_path)
+        return _limiters[key]
@@ -0,0 +1,145 @@
+import sqlite3
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+DEFAULT_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', '.cache/responses.sqlite3')
+DEFAULT_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL', 24 * 60 * 60))
+DEFAULT_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 2000))
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so re-indented f-string prompts share a key"""
+    return ' '.join(str(prompt).split())
+
+
+def make_cache_key(prompt, model_name, generation_config=None):
+    """Build a stable key from the normalized prompt, model and generation parameters"""
+    payload = json.dumps(
+        {
+            'prompt': normalize_prompt(prompt),
+            'model': model_name,
+            'config': generation_config or {},
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Disk-backed prompt -> response cache with TTL and LRU eviction"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by all Streamlit sessions, guarded by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                # Expired entries count as misses and are dropped right away
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def set(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO responses (key, response, created_at, last_access)
+                   VALUES (?, ?, ?, ?)""",
+                (key, response, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop expired rows first, then the least recently used ones over the cap
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+        if self.max_entries:
+            self._conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                       SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': size,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache shared by every Streamlit session"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
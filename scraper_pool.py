@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from image_scraper import ChromaImageScraper
+from image_store import get_image_store
+
+
+BatchResult = namedtuple('BatchResult', ['index', 'prompt', 'path', 'error'])
+
+
+class ScraperPool:
+    """Bounded pool of warm ChromaImageScraper instances.
+
+    Browsers are started lazily up to ``max_size``, health-checked on
+    checkout, recycled after ``max_uses`` generations and closed once they
+    have sat idle for ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, max_size=2, max_uses=25, idle_timeout=300, factory=ChromaImageScraper):
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self._cond = threading.Condition()
+        self._idle = []      # [scraper, uses, last_used], most recently used last
+        self._uses = {}      # id(scraper) -> uses, for checked-out scrapers
+        self._size = 0
+        self._closed = False
+
+        self._reaper = threading.Thread(target=self._reap_loop, name='scraper-reaper', daemon=True)
+        self._reaper.start()
+
+    def _expired(self, now):
+        expired = [entry for entry in self._idle if now - entry[2] > self.idle_timeout]
+        for entry in expired:
+            self._idle.remove(entry)
+            self._size -= 1
+        return [entry[0] for entry in expired]
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            with self._cond:
+                if self._closed:
+                    return
+                expired = self._expired(time.time())
+                if expired:
+                    self._cond.notify_all()
+            for scraper in expired:
+                self._quit(scraper)
+
+    def _quit(self, scraper):
+        try:
+            scraper.close()
+        except Exception:
+            pass
+
+    def checkout(self, timeout=None):
+        """Return a healthy scraper, waiting up to ``timeout`` seconds for one"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            create = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Scraper pool is closed")
+                    if self._idle:
+                        scraper, uses, _ = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        scraper, uses, create = None, 0, True
+                        break
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No scraper available in the pool")
+                    self._cond.wait(remaining)
+
+            # Start or probe the browser outside the lock
+            if create:
+                try:
+                    scraper = self.factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not scraper.is_healthy():
+                self._discard(scraper)
+                continue
+
+            with self._cond:
+                self._uses[id(scraper)] = uses
+            return scraper
+
+    def _discard(self, scraper):
+        self._quit(scraper)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def checkin(self, scraper, discard=False):
+        """Return a scraper to the pool, recycling it if worn out or broken"""
+        with self._cond:
+            uses = self._uses.pop(id(scraper), 0) + 1
+            if not (discard or self._closed or uses >= self.max_uses):
+                self._idle.append([scraper, uses, time.time()])
+                self._cond.notify()
+                return
+        self._discard(scraper)
+
+    @contextmanager
+    def scraper(self, timeout=None):
+        scraper = self.checkout(timeout)
+        try:
+            yield scraper
+        except Exception:
+            self.checkin(scraper, discard=True)
+            raise
+        else:
+            self.checkin(scraper)
+
+    def get_generated_image(self, prompt, use_store=True, timeout=None):
+        """Serve a repeated prompt from the image store, else borrow a browser"""
+        if use_store:
+            path = get_image_store().lookup(prompt)
+            if path:
+                return path
+        with self.scraper(timeout) as scraper:
+            return scraper.get_generated_image(prompt, use_store=use_store)
+
+    def _generate_one(self, index, prompt, use_store, timeout):
+        try:
+            path = self.get_generated_image(prompt, use_store, timeout)
+            error = None if path else "No image was generated"
+        except Exception as e:
+            path, error = None, str(e)
+        return BatchResult(index, prompt, path, error)
+
+    def generate_batch(self, prompts, max_concurrency=None, use_store=True, timeout=None):
+        """Generate one image per prompt across pooled browsers.
+
+        Yields a BatchResult for each prompt as soon as it finishes, so the
+        whole batch takes roughly as long as the slowest image. Concurrency
+        is capped at ``max_concurrency`` (default: the pool size).
+        """
+        prompts = list(prompts)
+        if not prompts:
+            return
+        workers = min(max_concurrency or self.max_size, self.max_size, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scraper-batch') as executor:
+            futures = [
+                executor.submit(self._generate_one, index, prompt, use_store, timeout)
+                for index, prompt in enumerate(prompts)
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for scraper, _, _ in idle:
+            self._quit(scraper)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_scraper_pool():
+    """Process-wide pool shared by every Streamlit session"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScraperPool(
+                max_size=int(os.getenv('SCRAPER_POOL_SIZE', 2)),
+                max_uses=int(os.getenv('SCRAPER_MAX_USES', 25)),
+                idle_timeout=int(os.getenv('SCRAPER_IDLE_TIMEOUT', 300))
+            )
+        return _pool
+
+
+def generate_batch(prompts, max_concurrency=None, use_store=True, timeout=None):
+    """Batch generation on the shared pool; see ScraperPool.generate_batch"""
+    return get_scraper_pool().generate_batch(prompts, max_concurrency, use_store, timeout)
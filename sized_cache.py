@@ -0,0 +1,35 @@
+import threading
+from collections import OrderedDict
+
+
+class SizedLRUCache:
+    """Thread-safe LRU cache bounded by the total size of its values.
+
+    Callers pass each value's size in bytes to ``set``; values are handed
+    back as stored, not copied, so treat them as read-only.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (value, nbytes)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, nbytes):
+        with self._lock:
+            if key in self._entries:
+                self._total -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._total += nbytes
+            # Always keep the newest value, even if it alone exceeds the budget
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total -= evicted